@@ -0,0 +1,9 @@
+"""Benchmarks of the game's hot paths.
+
+Times map generation, FoV, A* pathfinding, rendering and a full enemy
+phase over map sizes and entity counts, writes the results as JSON and
+compares them against a stored baseline:
+
+    python -m benchmarks --save-baseline    # on the reference version
+    python -m benchmarks                    # later, fails on regressions
+"""
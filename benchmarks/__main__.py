@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import sys
+
+# The render benchmark draws to a root console that is never shown. Set
+# before tcod is loaded
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from benchmarks.cases import CASES, ENTITY_COUNTS, MAP_SIZES  # noqa: E402
+from benchmarks.runner import (  # noqa: E402
+    compare,
+    environment,
+    format_comparison,
+    load,
+    run,
+    save,
+)
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+
+def parse_size(text: str) -> tuple:
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time the game's hot paths and compare them with a baseline",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [parse_size(size) for size in text.split(",")],
+        default=list(MAP_SIZES),
+        help="comma separated map sizes, such as 80x43,200x200",
+    )
+    parser.add_argument(
+        "--entities",
+        type=lambda text: [int(count) for count in text.split(",")],
+        default=list(ENTITY_COUNTS),
+        help="comma separated monster counts",
+    )
+    parser.add_argument(
+        "--cases",
+        type=lambda text: text.split(","),
+        default=list(CASES),
+        help=f"comma separated cases, among {','.join(CASES)}",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions")
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        help="JSON file for the results, '-' for stdout",
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown allowed before a case counts as a regression",
+    )
+    args = parser.parse_args(argv)
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {','.join(sorted(unknown))}")
+
+    # Progress and the comparison are for people, the results for tools
+    log = sys.stderr if args.output == "-" else sys.stdout
+    results = run(args.sizes, args.entities, args.cases, args.repeat, log=log)
+    document = {"environment": environment(), "results": results}
+
+    if args.save_baseline:
+        save(args.baseline, document)
+        print(f"Baseline saved to {args.baseline}", file=log)
+        return 0
+
+    regressions = 0
+    if os.path.exists(args.baseline):
+        comparison = compare(results, load(args.baseline)["results"], args.tolerance)
+        document["comparison"] = comparison
+        print(f"\nCompared with {args.baseline}:", file=log)
+        for entry in comparison:
+            print(format_comparison(entry), file=log)
+        regressions = sum(entry["status"] == "regression" for entry in comparison)
+    else:
+        print(f"\nNo baseline at {args.baseline}", file=log)
+
+    if args.output == "-":
+        json.dump(document, sys.stdout, indent=2)
+        print()
+    else:
+        save(args.output, document)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Benchmarked operations, and the worlds they run in.
+
+A case takes a `GameSession` and returns the function to be timed. Cases
+that do not depend on the number of entities are only run once per map
+size.
+"""
+import os
+import random
+
+import numpy as np
+import tcod as libtcod
+
+from camera import Camera
+from components.ai import BasicMonster
+from components.fighter import Fighter
+from entity import Entity
+from fov_functions import initialize_fov, recompute_fov
+from game_session import GameSession
+from game_states import GameStates
+from map_objects.game_map import GameMap
+from render_functions import RenderOrder, render_all
+from rng import RandomStreams
+from turn_scheduler import action_time
+
+MAP_SIZES = ((80, 43), (200, 200), (500, 500), (1000, 1000))
+ENTITY_COUNTS = (10, 100, 1000, 10000)
+# Screen the render benchmark draws, the same as the game's
+SCREEN_WIDTH = 80
+SCREEN_HEIGHT = 50
+PANEL_HEIGHT = 7
+BAR_WIDTH = 20
+COLORS = {
+    "dark_wall": libtcod.Color(0, 0, 100),
+    "dark_ground": libtcod.Color(50, 50, 150),
+    "light_wall": libtcod.Color(130, 110, 50),
+    "light_ground": libtcod.Color(200, 180, 50),
+}
+
+
+def max_rooms_for(width: int, height: int) -> int:
+    """Room attempts giving a map the same room density as the default one
+
+    Arguments:
+        width {int} -- map width
+        height {int} -- map height
+
+    Returns:
+        int -- maximum number of rooms
+    """
+    return max(30, 30 * width * height // (80 * 43))
+
+
+def build_session(width: int, height: int, monsters: int, seed: int = 0) -> GameSession:
+    """Create a game with a given number of monsters spread over the map
+
+    Every monster stays awake and the player cannot die.
+
+    Arguments:
+        width {int} -- map width
+        height {int} -- map height
+        monsters {int} -- number of monsters
+
+    Keyword Arguments:
+        seed {int} -- seed of the map and of the monster positions (default: {0})
+
+    Raises:
+        ValueError: if the map does not have room for that many monsters
+
+    Returns:
+        GameSession -- the game
+    """
+    session = GameSession(
+        seed=seed,
+        map_width=width,
+        map_height=height,
+        max_rooms=max_rooms_for(width, height),
+        max_monsters_per_room=0,
+        activation_radius=None,
+        messages_enabled=False,
+    )
+    session.player.fighter.max_hp = session.player.fighter.hp = 10 ** 9
+
+    game_map = session.game_map
+    xs, ys = np.nonzero(game_map.walkable & (game_map.blockers == 0))
+    # Leave most of the floor free, a packed map is not a game
+    if monsters > len(xs) // 4:
+        raise ValueError(f"No room for {monsters} monsters on a {width}x{height} map")
+    for index in random.Random(seed).sample(range(len(xs)), monsters):
+        monster = Entity(
+            int(xs[index]),
+            int(ys[index]),
+            "o",
+            libtcod.desaturated_green,
+            "Orc",
+            blocks=True,
+            render_order=RenderOrder.ACTOR,
+            fighter=Fighter(hp=10, defense=0, power=3),
+            ai=BasicMonster(),
+        )
+        session.entities.append(monster)
+        game_map.add_entity(monster)
+        session.scheduler.schedule(monster, action_time(monster.ai.speed))
+    session.update_fov()
+    return session
+
+
+def bench_make_map(session: GameSession) -> object:
+    """Time generating a map of the session's size, monsters and items included
+    """
+    width, height = session.game_map.width, session.game_map.height
+    max_rooms = max_rooms_for(width, height)
+
+    def run():
+        # Same seed every time, so every run builds the same map
+        player = Entity(0, 0, "@", libtcod.white, "Player", blocks=True)
+        GameMap(width, height).make_map(
+            max_rooms,
+            6,
+            10,
+            player,
+            [player],
+            max_monsters_per_room=3,
+            rng=RandomStreams(0),
+        )
+
+    return run
+
+
+def bench_initialize_fov(session: GameSession) -> object:
+    """Time building the FoV map from the tile arrays
+    """
+    game_map = session.game_map
+
+    def run():
+        initialize_fov(game_map)
+
+    return run
+
+
+def bench_recompute_fov(session: GameSession) -> object:
+    """Time computing the player's FoV
+    """
+    fov_map, player = session.fov_map, session.player
+
+    def run():
+        recompute_fov(
+            fov_map,
+            player.x,
+            player.y,
+            session.fov_radius,
+            session.fov_light_walls,
+            session.fov_algorithm,
+        )
+
+    return run
+
+
+def bench_move_astar(session: GameSession) -> object:
+    """Time one A* step of a monster towards the player
+    """
+    player, game_map, entities = session.player, session.game_map, session.entities
+    # The AI attacks instead of moving when next to the player
+    monsters = [
+        entity
+        for entity in entities
+        if entity.ai is not None and entity.distance_to(player) >= 2
+    ]
+    state = {"next": 0}
+
+    def run():
+        # One step of one monster per call, taking turns. The monster is put
+        # back, so every call searches the same paths
+        monster = monsters[state["next"]]
+        state["next"] = (state["next"] + 1) % len(monsters)
+        x, y = monster.x, monster.y
+        monster.move_astar(player, game_map, entities)
+        monster.move(x - monster.x, y - monster.y)
+
+    return run
+
+
+def bench_render_all(session: GameSession) -> object:
+    """Time drawing a full frame to an off-screen root console
+    """
+    init_screen()
+    panel_y = SCREEN_HEIGHT - PANEL_HEIGHT
+    console = libtcod.console.Console(SCREEN_WIDTH, SCREEN_HEIGHT)
+    panel = libtcod.console.Console(SCREEN_WIDTH, PANEL_HEIGHT)
+    game_map = session.game_map
+    camera = Camera(SCREEN_WIDTH, panel_y, game_map.width, game_map.height)
+    mouse = libtcod.Mouse()
+
+    def run():
+        # Full frame, as drawn after the player moved
+        render_all(
+            con=console,
+            panel=panel,
+            entities=session.entities,
+            player=session.player,
+            game_map=game_map,
+            camera=camera,
+            fov_map=session.fov_map,
+            fov_recompute=True,
+            message_log=session.message_log,
+            screen_width=SCREEN_WIDTH,
+            screen_height=SCREEN_HEIGHT,
+            bar_width=BAR_WIDTH,
+            panel_height=PANEL_HEIGHT,
+            panel_y=panel_y,
+            mouse=mouse,
+            colors=COLORS,
+            gs=session.game_state,
+        )
+
+    return run
+
+
+def bench_enemy_phase(session: GameSession) -> object:
+    """Time letting every monster act once
+    """
+    game_map, player = session.game_map, session.player
+    monsters = [entity for entity in session.entities if entity.ai is not None]
+    positions = [(monster.x, monster.y) for monster in monsters]
+    hp = [monster.fighter.hp for monster in monsters]
+    player_hp = player.fighter.hp
+
+    def run():
+        # Put everything back where it started, so every phase has the same
+        # monsters walking the same paths and making the same attacks
+        for monster, (x, y), monster_hp in zip(monsters, positions, hp):
+            if monster.x != x or monster.y != y:
+                game_map.move_entity(monster, x, y)
+            monster.fighter.hp = monster_hp
+        player.fighter.hp = player_hp
+        session.game_state = GameStates.ENEMY_TURN
+        session.take_enemy_turns()
+
+    return run
+
+
+# name -> (case, whether it depends on the number of entities)
+CASES = {
+    "make_map": (bench_make_map, False),
+    "initialize_fov": (bench_initialize_fov, False),
+    "recompute_fov": (bench_recompute_fov, False),
+    "move_astar": (bench_move_astar, True),
+    "render_all": (bench_render_all, True),
+    "enemy_phase": (bench_enemy_phase, True),
+}
+
+_root_console = None
+
+
+def init_screen():
+    """Create the root console the renderer blits to, once
+    """
+    global _root_console
+    if _root_console is not None:
+        return
+    font = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "arial10x10.png"
+    )
+    libtcod.console_set_custom_font(
+        font, libtcod.FONT_TYPE_GREYSCALE | libtcod.FONT_LAYOUT_TCOD
+    )
+    _root_console = libtcod.console_init_root(
+        SCREEN_WIDTH, SCREEN_HEIGHT, "Benchmarks", False
+    )
@@ -0,0 +1,169 @@
+import json
+import os
+import platform
+import statistics
+import time
+import timeit
+
+import numpy as np
+import tcod as libtcod
+
+from benchmarks.cases import CASES, build_session
+
+
+def measure(function: object, repeat: int = 5) -> dict:
+    """Time a function
+
+    Calls are batched so that each repetition lasts at least 0.2 seconds.
+
+    Arguments:
+        function {callable} -- function to be timed, called without arguments
+
+    Keyword Arguments:
+        repeat {int} -- number of timed repetitions (default: {5})
+
+    Returns:
+        dict -- calls per repetition, best and median time of one call in milliseconds
+    """
+    timer = timeit.Timer(function)
+    # Also warms up caches and lazily built structures
+    number, _ = timer.autorange()
+    times = [total / number * 1000 for total in timer.repeat(repeat, number)]
+    return {
+        "calls": number,
+        "best_ms": min(times),
+        "median_ms": statistics.median(times),
+    }
+
+
+def run(
+    sizes: list, entity_counts: list, cases: list, repeat: int = 5, log: object = None
+) -> list:
+    """Run benchmark cases over map sizes and entity counts
+
+    Combinations where the map does not have room for the entities are
+    skipped.
+
+    Arguments:
+        sizes {list} -- (width, height) of the maps
+        entity_counts {list} -- number of monsters on the map
+        cases {list} -- names of the cases to run, from `CASES`
+
+    Keyword Arguments:
+        repeat {int} -- timed repetitions of each case (default: {5})
+        log {file} -- where to report progress, None to stay quiet (default: {None})
+
+    Returns:
+        list -- one result per case and combination
+    """
+    results = []
+    for width, height in sizes:
+        map_cases_done = False
+        for entities in entity_counts:
+            try:
+                session = build_session(width, height, entities)
+            except ValueError:
+                # Not enough room on this map
+                continue
+            for name in cases:
+                case, uses_entities = CASES[name]
+                if not uses_entities and map_cases_done:
+                    continue
+                result = {
+                    "case": name,
+                    "map": f"{width}x{height}",
+                    "entities": entities if uses_entities else None,
+                }
+                result.update(measure(case(session), repeat))
+                results.append(result)
+                if log is not None:
+                    print(format_result(result), file=log, flush=True)
+            map_cases_done = True
+    return results
+
+
+def environment() -> dict:
+    """Describe the machine and the versions the benchmarks ran with
+
+    Returns:
+        dict -- environment description
+    """
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "tcod": getattr(libtcod, "__version__", None),
+    }
+
+
+def result_key(result: dict) -> tuple:
+    return result["case"], result["map"], result["entities"]
+
+
+def format_result(result: dict) -> str:
+    entities = "-" if result["entities"] is None else result["entities"]
+    return (
+        f"{result['case']:<16}{result['map']:>10}{entities:>8}"
+        f"{result['best_ms']:>12.3f} ms"
+    )
+
+
+def compare(results: list, baseline: list, tolerance: float = 0.2) -> list:
+    """Compare results against a baseline, by best time
+
+    Arguments:
+        results {list} -- results of this run
+        baseline {list} -- results of the reference run
+
+    Keyword Arguments:
+        tolerance {float} -- relative slowdown allowed before reporting a regression (default: {0.2})
+
+    Returns:
+        list -- for each result, its baseline time, the ratio between both and
+                a status: "regression", "improvement", "ok" or "new"
+    """
+    reference = {result_key(result): result for result in baseline}
+    comparison = []
+    for result in results:
+        entry = {
+            "case": result["case"],
+            "map": result["map"],
+            "entities": result["entities"],
+            "best_ms": result["best_ms"],
+            "baseline_ms": None,
+            "ratio": None,
+            "status": "new",
+        }
+        old = reference.get(result_key(result))
+        if old is not None:
+            ratio = result["best_ms"] / old["best_ms"]
+            entry["baseline_ms"] = old["best_ms"]
+            entry["ratio"] = ratio
+            if ratio > 1 + tolerance:
+                entry["status"] = "regression"
+            elif ratio < 1 / (1 + tolerance):
+                entry["status"] = "improvement"
+            else:
+                entry["status"] = "ok"
+        comparison.append(entry)
+    return comparison
+
+
+def format_comparison(entry: dict) -> str:
+    if entry["ratio"] is None:
+        return f"{format_result(entry)}{'':>14}  {entry['status']}"
+    return f"{format_result(entry)}{entry['ratio']:>12.2f}x  {entry['status']}"
+
+
+def load(path: str) -> dict:
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def save(path: str, document: dict):
+    with open(path, "w") as results_file:
+        json.dump(document, results_file, indent=2)
+        results_file.write("\n")
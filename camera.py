@@ -0,0 +1,109 @@
+class Camera:
+    """Viewport over the map, following the player.
+
+    Maps world coordinates to screen coordinates and back. Only the part of
+    the map inside the view rectangle is drawn, so the cost of a frame
+    depends on the screen size and not on the map size.
+    """
+
+    __slots__ = ("x", "y", "width", "height", "map_width", "map_height")
+
+    def __init__(self, width: int, height: int, map_width: int, map_height: int):
+        """Camera initializer
+
+        Arguments:
+            width {int} -- width of the screen area showing the map
+            height {int} -- height of the screen area showing the map
+            map_width {int} -- map width
+            map_height {int} -- map height
+        """
+        # The view never extends past the map
+        self.width = min(width, map_width)
+        self.height = min(height, map_height)
+        self.map_width = map_width
+        self.map_height = map_height
+        self.x = 0  # world position of the top left corner of the view
+        self.y = 0
+
+    def follow(self, x: int, y: int) -> bool:
+        """Center the view on a position, without leaving the map
+
+        Arguments:
+            x {int} -- x position to center on
+            y {int} -- y position to center on
+
+        Returns:
+            bool -- True if the view moved
+        """
+        new_x = min(max(x - self.width // 2, 0), self.map_width - self.width)
+        new_y = min(max(y - self.height // 2, 0), self.map_height - self.height)
+        if (new_x, new_y) == (self.x, self.y):
+            return False
+        self.x, self.y = new_x, new_y
+        return True
+
+    def view(self) -> tuple:
+        """Slices selecting the viewed part of an `[x, y]` map array
+
+        Returns:
+            tuple -- (x slice, y slice)
+        """
+        return (
+            slice(self.x, self.x + self.width),
+            slice(self.y, self.y + self.height),
+        )
+
+    def contains(self, x: int, y: int) -> bool:
+        """Check if a world position is inside the view
+
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+
+        Returns:
+            bool -- True if the position is on screen
+        """
+        return 0 <= x - self.x < self.width and 0 <= y - self.y < self.height
+
+    def to_screen(self, x: int, y: int) -> tuple:
+        """Convert a world position to a screen position
+
+        Arguments:
+            x {int} -- x position in the map
+            y {int} -- y position in the map
+
+        Returns:
+            tuple -- (x, y) position on screen
+        """
+        return x - self.x, y - self.y
+
+    def to_world(self, x: int, y: int) -> tuple:
+        """Convert a screen position to a world position
+
+        Arguments:
+            x {int} -- x position on screen
+            y {int} -- y position on screen
+
+        Returns:
+            tuple -- (x, y) position in the map
+        """
+        return x + self.x, y + self.y
+
+    def screen_rect(self, x: int, y: int, width: int, height: int) -> tuple or None:
+        """Part of a world rectangle that is on screen, in screen coordinates
+
+        Arguments:
+            x {int} -- x position of the rectangle in the map
+            y {int} -- y position of the rectangle in the map
+            width {int} -- rectangle width
+            height {int} -- rectangle height
+
+        Returns:
+            tuple or None -- (x, y, width, height) on screen, None if off screen
+        """
+        x1, y1 = max(x - self.x, 0), max(y - self.y, 0)
+        x2 = min(x + width - self.x, self.width)
+        y2 = min(y + height - self.y, self.height)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        return x1, y1, x2 - x1, y2 - y1
@@ -1,14 +1,26 @@
-from random import randint
+import random
 
 import tcod as libtcod
 
 from game_messages import Message
+from turn_scheduler import NORMAL_SPEED
 
 
 class BasicMonster:
     """Basic Monster behaviour component
     """
 
+    __slots__ = ("owner", "speed", "turns_unseen")
+
+    def __init__(self, speed: int = NORMAL_SPEED):
+        """BasicMonster initializer
+
+        Keyword Arguments:
+            speed {int} -- how often the monster acts, 100 being once per player action (default: {NORMAL_SPEED})
+        """
+        self.speed = speed
+        self.turns_unseen = 0  # consecutive turns spent outside the FoV
+
     def take_turn(
         self, target: object, fov_map: object, game_map: object, entities: list
     ) -> list:
@@ -27,13 +39,23 @@ class BasicMonster:
         monster = self.owner
         # If the monster is in the FoV
         if libtcod.map_is_in_fov(fov_map, monster.x, monster.y):
+            self.turns_unseen = 0
             # If the target is too far move towards it
             if monster.distance_to(target) >= 2:
-                monster.move_astar(target, game_map, entities)
+                # Follow the shared flow field when it leads to this target
+                # within the same 25 steps A* allows, else fallback to A*
+                if not (
+                    game_map.flow_target == (target.x, target.y)
+                    and game_map.flow_distance(monster.x, monster.y) < 25
+                    and monster.move_downhill(game_map)
+                ):
+                    monster.move_astar(target, game_map, entities)
             # Else, attack
             elif target.fighter.hp > 0:
                 attack_results = monster.fighter.attack(target)
                 results.extend(attack_results)
+        else:
+            self.turns_unseen += 1
 
         return results
 
@@ -42,9 +64,36 @@ class ConfusedMonster:
     """Confused monster behaviour.
     """
 
-    def __init__(self, previous_ai: BasicMonster, number_of_turns: int = 10):
+    __slots__ = ("owner", "previous_ai", "number_of_turns", "rng")
+
+    def __init__(
+        self,
+        previous_ai: BasicMonster,
+        number_of_turns: int = 10,
+        rng: random.Random = None,
+    ):
+        """ConfusedMonster initializer
+
+        Arguments:
+            previous_ai {BasicMonster} -- behaviour restored when the confusion ends
+
+        Keyword Arguments:
+            number_of_turns {int} -- how long the confusion lasts (default: {10})
+            rng {random.Random} -- random number generator for the wandering (default: {the `random` module})
+        """
         self.previous_ai = previous_ai
         self.number_of_turns = number_of_turns
+        self.rng = rng or random
+
+    @property
+    def speed(self) -> int:
+        # Confusion does not change how fast the monster is
+        return self.previous_ai.speed
+
+    @property
+    def turns_unseen(self) -> int:
+        # Confused monsters wander on their own, they never fall asleep
+        return 0
 
     def take_turn(
         self, target: object, fov_map: object, game_map: object, entities: list
@@ -63,8 +112,8 @@ class ConfusedMonster:
         results = []
 
         if self.number_of_turns > 0:
-            random_x = self.owner.x + randint(0, 2) - 1
-            random_y = self.owner.y + randint(0, 2) - 1
+            random_x = self.owner.x + self.rng.randint(0, 2) - 1
+            random_y = self.owner.y + self.rng.randint(0, 2) - 1
 
             if random_x != self.owner.x and random_y != self.owner.y:
                 self.owner.move_towards(random_x, random_y, game_map, entities)
@@ -73,11 +122,9 @@ class ConfusedMonster:
         else:
             self.owner.ai = self.previous_ai
             results.append(
-                {
-                    "message": Message(
-                        f"The {self.owner.name} is no longer confused!", libtcod.red,
-                    )
-                }
+                Message(
+                    "The {} is no longer confused!", libtcod.red, (self.owner.name,)
+                )
             )
 
         return results
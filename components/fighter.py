@@ -1,12 +1,18 @@
 import tcod as libtcod
 
+from game_events import Damaged, Dead
 from game_messages import Message
 
 
-class Fighter:
+class BaseFighter:
     """Fighter component. defines fighting behaviour
+
+    Subclasses declare where the HP are kept: on the object for `Fighter`,
+    in an `EntityRegistry` row for `entity_registry.RegisteredFighter`.
     """
 
+    __slots__ = ("owner", "defense", "atk_power")
+
     def __init__(self, hp: int, defense: int, power: int):
         """Fighter initializer.
         
@@ -32,7 +38,7 @@ class Fighter:
         results = []
         self.hp -= amount
         if self.hp <= 0:
-            results.append({"dead": self.owner})
+            results.append(Dead(self.owner))
         return results
 
     def heal(self, amount: int):
@@ -63,20 +69,26 @@ class Fighter:
 
         if damage > 0:
             results.append(
-                {
-                    "message": Message(
-                        f"{self.owner.name} attacks {target.name} for {damage} hit points."
-                    )
-                }
+                Message(
+                    "{} attacks {} for {} hit points.",
+                    args=(self.owner.name, target.name, damage),
+                )
             )
+            results.append(Damaged(target, damage, self.owner))
             results.extend(target.fighter.take_damage(damage))
         else:
             results.append(
-                {
-                    "message": Message(
-                        f"{self.owner.name.capitalize()} attacks {target.name} but does no damage."
-                    )
-                }
+                Message(
+                    "{} attacks {} but does no damage.",
+                    args=(self.owner.name.capitalize(), target.name),
+                )
             )
 
         return results
+
+
+class Fighter(BaseFighter):
+    """Fighter keeping its HP itself
+    """
+
+    __slots__ = ("max_hp", "hp")
@@ -1,5 +1,6 @@
 import tcod as libtcod
 
+from game_events import ItemAdded, ItemConsumed, ItemDropped, Targeting
 from game_messages import Message
 
 
@@ -7,6 +8,8 @@ class Inventory:
     """Inventory class. Defines Inventory logic and behaviour
     """
 
+    __slots__ = ("owner", "capacity", "items")
+
     def __init__(self, capacity: int):
         """Inventory initializer.
         
@@ -31,23 +34,14 @@ class Inventory:
 
         if len(self.items) >= self.capacity:
             results.append(
-                {
-                    "item_added": None,
-                    "message": Message(
-                        "You cannot carry any more, your inventory is full!",
-                        color=libtcod.yellow,
-                    ),
-                }
+                Message(
+                    "You cannot carry any more, your inventory is full!",
+                    color=libtcod.yellow,
+                )
             )
         else:
-            results.append(
-                {
-                    "item_added": item,
-                    "message": Message(
-                        f"You pickup a {item.name}", color=libtcod.blue,
-                    ),
-                }
-            )
+            results.append(Message("You pickup a {}", libtcod.blue, (item.name,)))
+            results.append(ItemAdded(item))
             self.items.append(item)
 
         return results
@@ -78,25 +72,22 @@ class Inventory:
         # Check if the item is usable
         if item_component.use_function is None:
             results.append(
-                {
-                    "message": Message(
-                        f"The {item_entity.name} cannot be used", color=libtcod.yellow
-                    )
-                }
+                Message("The {} cannot be used", libtcod.yellow, (item_entity.name,))
             )
         else:
             # If this item need targeting, and no target was selected
             if item_component.targeting and not (
                 kwargs.get("target_x") or kwargs.get("target_y")
             ):
-                results.append({"targeting": item_entity})
+                results.append(Targeting(item_entity))
             # Else just use the item with its item_function
             else:
                 kwargs = {**item_component.function_kwargs, **kwargs}
                 item_use_results = item_component.use_function(self.owner, **kwargs)
                 for result in item_use_results:
-                    if result.get("consumed"):
+                    if isinstance(result, ItemConsumed):
                         # Once item has been used, remove from inventory
+                        result.item = item_entity
                         self.remove_item(item_entity)
 
                 results.extend(item_use_results)
@@ -110,12 +101,8 @@ class Inventory:
         item.y = self.owner.y
 
         self.remove_item(item)
-        results.append(
-            {
-                "item_dropped": item,
-                "message": Message(f"You dropped {item.name} in the ground."),
-            }
-        )
+        results.append(Message("You dropped {} in the ground.", args=(item.name,)))
+        results.append(ItemDropped(item))
 
         return results
 
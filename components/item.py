@@ -2,6 +2,14 @@ class Item:
     """Item class. Defines item component behaviour
     """
 
+    __slots__ = (
+        "owner",
+        "use_function",
+        "targeting",
+        "targeting_message",
+        "function_kwargs",
+    )
+
     def __init__(
         self,
         use_function: callable = None,
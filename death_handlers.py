@@ -8,19 +8,25 @@ from render_functions import RenderOrder
 def kill_player(player):
     player.char = "%"
     player.color = libtcod.dark_red
+    if player.game_map is not None:
+        player.game_map.dirty.mark_cell(player.x, player.y)
 
     return Message("You Died!", color=libtcod.red), GameStates.PLAYER_DEAD
 
 
 def kill_monster(monster):
-    death_message = Message(f"{monster.name.capitalize()} is dead!", libtcod.orange)
+    death_message = Message("{} is dead!", libtcod.orange, (monster.name.capitalize(),))
 
     monster.char = "%"
     monster.color = libtcod.dark_red
-    monster.blocks = False
+    if monster.game_map is not None:
+        monster.game_map.set_entity_blocks(monster, False)
+        monster.game_map.set_render_order(monster, RenderOrder.CORPSE)
+    else:
+        monster.blocks = False
+        monster.render_order = RenderOrder.CORPSE
     monster.fighter = None
     monster.ai = None
     monster.name = f"remains of {monster.name}"
-    monster.render_order = RenderOrder.CORPSE
 
     return death_message
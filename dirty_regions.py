@@ -0,0 +1,48 @@
+class DirtyRegions:
+    """Tracks which parts of the screen changed since the last frame.
+
+    Map cells are marked dirty when something on them changes (an entity
+    moves, dies, is picked up or dropped). The renderer then redraws and
+    blits only those cells, unless a full redraw was requested.
+    """
+
+    __slots__ = ("cells", "full_redraw", "panel_key", "game_state")
+
+    def __init__(self):
+        """DirtyRegions initializer
+        """
+        self.cells = set()  # (x, y) map cells to be redrawn
+        self.full_redraw = True  # the first frame draws everything
+        self.panel_key = None  # state shown in the UI panel on the last frame
+        self.game_state = None  # game state of the last frame
+
+    def mark_cell(self, x: int, y: int):
+        """Flag a single map cell for redrawing
+
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+        """
+        self.cells.add((x, y))
+
+    def mark_all(self):
+        """Flag the whole screen for redrawing
+        """
+        self.full_redraw = True
+
+    def bounds(self) -> tuple:
+        """Smallest rectangle containing every dirty cell
+
+        Returns:
+            tuple -- (x, y, width, height) of the rectangle
+        """
+        xs = [x for x, _ in self.cells]
+        ys = [y for _, y in self.cells]
+        x1, y1 = min(xs), min(ys)
+        return x1, y1, max(xs) - x1 + 1, max(ys) - y1 + 1
+
+    def clear(self):
+        """Forget every mark, once the frame has been drawn
+        """
+        self.cells.clear()
+        self.full_redraw = False
@@ -1,15 +1,15 @@
+import random
+
 import tcod as libtcod
+import tcod.event
 
-from components.fighter import Fighter
-from components.inventory import Inventory
-from death_handlers import kill_monster, kill_player
-from entity import Entity, get_blocking_entities_at_location
-from fov_functions import initialize_fov, recompute_fov
-from game_states import GameStates
-from game_messages import Message, MessageLog
+from camera import Camera
+from game_messages import Message
+from game_session import GameSession
 from input_handlers import handle_keys, handle_mouse
-from map_objects.game_map import GameMap
-from render_functions import clear_all, render_all, RenderOrder
+from profiling import profiler
+from render_functions import render_all, render_profiler
+from replay import ActionRecorder
 
 
 def main():
@@ -23,7 +23,11 @@ def main():
     message_x = bar_width + 2
     message_width = screen_width - bar_width - 2
     message_height = panel_height - 1
-    # Map size
+    # Full message history, kept on disk and paged through with "v"
+    history_path = "message_history.log"
+    history_page_size = screen_height - panel_height - 3
+    # Map size, independent from the screen: the camera shows the part of
+    # the map around the player
     map_width = 80
     map_height = 43
     # Room definitions
@@ -34,7 +38,24 @@ def main():
     fov_algorithm = 0  # use defualt algorithm
     fov_light_walls = True  # light up walls we can see
     fov_radius = 10  # radius of view
-    fov_recompute = True  # flag to trigger FoV computations
+    # Monsters chase the player using one shared flow field instead of A* each
+    use_flow_field = True
+    # Keep the entities' state in parallel arrays instead of on each object
+    use_registry = False
+    # Game loop settings
+    event_driven = True  # only redraw when something changed, wait while idle
+    fps_limit = 30  # frame-rate cap, 0 for none
+    idle_timeout = 1.0  # longest wait for input while idle, in seconds
+    # Seed of the game, set it to replay the same dungeon and monster moves
+    seed = None
+    # Every action is recorded here, play it back with replay.py
+    record_path = "last_game.replay"
+    # Profiling: F3 shows how long each phase takes, F4 starts and stops a
+    # capture of the following turns
+    profile = False  # time the phases even while the timings are hidden
+    profile_turns = None  # (first, last) turns to capture, such as (10, 20)
+    # Chrome trace (chrome://tracing), or cProfile stats if ending in .prof
+    profile_path = "profile.json"
     # Monster spawning settings
     max_monsters_per_room = 3
     # Define colors to be used in FoV
@@ -49,243 +70,172 @@ def main():
         "arial10x10.png", libtcod.FONT_TYPE_GREYSCALE | libtcod.FONT_LAYOUT_TCOD
     )
 
-    # Player initialization
-    fighter_component = Fighter(
-        hp=30, defense=2, power=5
-    )  # define a fighter component for the player
-    inventory_component = Inventory(26)  # Inventory component for the player
-    player = Entity(
-        0,
-        0,
-        "@",
-        libtcod.white,
-        "Player",
-        blocks=True,
-        render_order=RenderOrder.ACTOR,
-        fighter=fighter_component,
-        inventory=inventory_component,
-    )
-    # World entity list
-    entities = [player]
-    # Map object
-    game_map = GameMap(map_width, map_height)
-    game_map.make_map(
-        max_rooms,
-        room_min_size,
-        room_max_size,
-        player,
-        entities,
-        max_monsters_per_room=max_monsters_per_room,
-    )
-    # Fov map object
-    fov_map = initialize_fov(game_map)
-    # Game state
-    game_state = GameStates.PLAYERS_TURN
-    previous_game_state = game_state
-
-    # For item targeting
-    targeting_item = None
+    # A recorded game needs a seed to be replayed
+    if record_path and seed is None:
+        seed = random.randrange(2 ** 32)
+    session_config = {
+        "map_width": map_width,
+        "map_height": map_height,
+        "max_rooms": max_rooms,
+        "room_min_size": room_min_size,
+        "room_max_size": room_max_size,
+        "max_monsters_per_room": max_monsters_per_room,
+        "fov_algorithm": fov_algorithm,
+        "fov_light_walls": fov_light_walls,
+        "fov_radius": fov_radius,
+        "use_flow_field": use_flow_field,
+        "use_registry": use_registry,
+        "message_x": message_x,
+        "message_width": message_width,
+        "message_height": message_height,
+        "history_page_size": history_page_size,
+    }
+    # Game logic and state, independent from the window
+    session = GameSession(seed=seed, history_path=history_path, **session_config)
+    recorder = None
+    if record_path:
+        recorder = ActionRecorder(
+            record_path,
+            seed,
+            {
+                "session": session_config,
+                "history": history_path is not None,
+                "screen": {
+                    "width": screen_width,
+                    "height": screen_height,
+                    "bar_width": bar_width,
+                    "panel_height": panel_height,
+                },
+                "colors": {
+                    name: [color.r, color.g, color.b] for name, color in colors.items()
+                },
+            },
+        )
 
     # Creating screen
     libtcod.console_init_root(
         screen_width, screen_height, "Roguelike using libtcod", False
     )
+    libtcod.sys_set_fps(fps_limit)
+
+    # View over the map, in the screen area above the panel
+    camera = Camera(screen_width, panel_y, map_width, map_height)
+    camera.follow(session.player.x, session.player.y)
 
     # Console object
     console = libtcod.console.Console(screen_width, screen_height)
     # Panel object
     panel = libtcod.console.Console(screen_width, panel_height)
-    # Message Log object
-    message_log = MessageLog(message_x, message_width, message_height)
 
     # input objects
     key = libtcod.Key()
     mouse = libtcod.Mouse()
+    mouse_cell = None  # last cell the mouse was seen over
+
+    # Redraw flag, used when the loop is event driven
+    redraw = True
+    # Timings overlay, toggled with F3
+    show_profiler = False
+    profiler.enabled = profile
+    if profile_turns:
+        profiler.capture(*profile_turns, profile_path)
 
     # Game loop
     while not libtcod.console_is_window_closed():
+        frame_start = profiler.start()
         # Capture input events
         libtcod.sys_check_for_event(
             libtcod.EVENT_KEY_PRESS | libtcod.EVENT_MOUSE, key, mouse
         )
-        # Trigger FoV calculation
-        if fov_recompute == True:
-            recompute_fov(
-                fov_map, player.x, player.y, fov_radius, fov_light_walls, fov_algorithm
+        profiler.stop("input", frame_start)
+        # The names under the mouse need updating when it changes cell
+        if (mouse.cx, mouse.cy) != mouse_cell:
+            mouse_cell = (mouse.cx, mouse.cy)
+            redraw = True
+
+        # The timings change every frame while they are shown
+        if redraw or not event_driven or show_profiler:
+            # Trigger FoV calculation
+            start = profiler.start()
+            fov_recompute = session.update_fov()
+            profiler.stop("fov", start)
+            # Initial screen config
+            render_all(
+                con=console,
+                panel=panel,
+                entities=session.entities,
+                player=session.player,
+                game_map=session.game_map,
+                camera=camera,
+                fov_map=session.fov_map,
+                fov_recompute=fov_recompute,
+                message_log=session.message_log,
+                screen_width=screen_width,
+                screen_height=screen_height,
+                bar_width=bar_width,
+                panel_height=panel_height,
+                panel_y=panel_y,
+                mouse=mouse,
+                colors=colors,
+                gs=session.game_state,
+                history_scroll=session.history_scroll,
+                history_page_size=history_page_size,
             )
-        # Initial screen config
-        render_all(
-            con=console,
-            panel=panel,
-            entities=entities,
-            player=player,
-            game_map=game_map,
-            fov_map=fov_map,
-            fov_recompute=fov_recompute,
-            message_log=message_log,
-            screen_width=screen_width,
-            screen_height=screen_height,
-            bar_width=bar_width,
-            panel_height=panel_height,
-            panel_y=panel_y,
-            mouse=mouse,
-            colors=colors,
-            gs=game_state,
-        )
-        fov_recompute = False
-        libtcod.console_flush()
-
-        # Clear all entities
-        clear_all(console, entities)
-
-        # Capture action for given input
-        action = handle_keys(key, game_state)
-        mouse_action = handle_mouse(mouse)
-        # Map values for each action
-        move = action.get("move")
-        pickup = action.get("pickup")
-        show_inventory = action.get("show_inventory")
-        drop_inventory = action.get("drop_inventory")
-        inv_index = action.get("inventory_index")
-        left_click = mouse_action.get("left_click")
-        right_click = mouse_action.get("right_click")
-        _exit = action.get("exit")
-        fullscreen = action.get("fullscreen")
-        player_turn_results = []
-
-        # Handle movement. Check if this is players turn
-        if move and game_state == GameStates.PLAYERS_TURN:
-            dx, dy = move
-            dest_x, dest_y = player.x + dx, player.y + dy
-            if not game_map.is_blocked(dest_x, dest_y):
-                target = get_blocking_entities_at_location(entities, dest_x, dest_y)
-                if target:
-                    attack_results = player.fighter.attack(target)
-                    player_turn_results.extend(attack_results)
-                else:
-                    player.move(dx, dy)
-                    fov_recompute = True
-                # Now it is enemies turn
-                game_state = GameStates.ENEMY_TURN
-        elif pickup and game_state == GameStates.PLAYERS_TURN:
-            for entity in entities:
-                if entity.item and entity.x == player.x and entity.y == player.y:
-                    pickup_results = player.inventory.add_item(entity)
-                    player_turn_results.extend(pickup_results)
-                    break
-            else:
-                message_log.add_message(
-                    Message("There's nothing to pickup", color=libtcod.yellow)
-                )
-        # Show player inventory
-        if show_inventory:
-            previous_game_state = game_state
-            game_state = GameStates.SHOW_INVENTORY
-        # Drop item dialog
-        if drop_inventory:
-            previous_game_state = game_state
-            game_state = GameStates.DROP_INVENTORY
-        if (
-            inv_index is not None
-            and previous_game_state != GameStates.PLAYER_DEAD
-            and inv_index < len(player.inventory.items)
+            if show_profiler:
+                render_profiler(profiler, screen_width)
+            redraw = False
+            start = profiler.start()
+            libtcod.console_flush()
+            profiler.stop("flush", start)
+        elif key.vk == libtcod.KEY_NONE and not (
+            mouse.lbutton_pressed or mouse.rbutton_pressed
         ):
-            item = player.inventory.items[inv_index]
-            if game_state == GameStates.SHOW_INVENTORY:
-                player_turn_results.extend(
-                    player.inventory.use(item, entities=entities, fov_map=fov_map)
-                )
-            elif game_state == GameStates.DROP_INVENTORY:
-                player_turn_results.extend(player.inventory.drop_item(item))
-        if game_state == GameStates.TARGET_MODE:
-            if left_click:
-                target_x, target_y = left_click
+            # Nothing changed and there is no input: sleep until SDL has
+            # events. They are left queued for sys_check_for_event
+            libtcod.event.wait(idle_timeout)
+            continue
 
-                item_use_results = player.inventory.use(
-                    targeting_item,
-                    entities=entities,
-                    fov_map=fov_map,
-                    target_x=target_x,
-                    target_y=target_y,
-                )
+        # Capture action for given input
+        action = handle_keys(key, session.game_state)
+        mouse_action = handle_mouse(mouse, camera)
 
-                player_turn_results.extend(item_use_results)
-            elif right_click:
-                player_turn_results.append({"targeting_cancelled": True})
+        if recorder is not None:
+            recorder.record(action, mouse_action)
+        # Run the game logic for this input
+        results = session.step(action, mouse_action)
         # Handle game exit
-        if _exit:
-            if game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY):
-                game_state = previous_game_state
-            elif game_state == GameStates.TARGET_MODE:
-                player_turn_results.append({"targeting_cancelled": True})
-            else:
-                return True
+        if session.exit_requested:
+            profiler.finish_capture()
+            session.close()
+            if recorder is not None:
+                recorder.close()
+            return True
         # toggle fullscreen
-        if fullscreen:
+        if action.get("fullscreen"):
             libtcod.console_set_fullscreen(not libtcod.console_is_fullscreen())
-
-        # Cycle through players action log
-        for player_turn_result in player_turn_results:
-            message = player_turn_result.get("message")
-            dead_entity = player_turn_result.get("dead")
-            item_added = player_turn_result.get("item_added")
-            item_consumed = player_turn_result.get("consumed")
-            item_dropped = player_turn_result.get("item_dropped")
-            targeting = player_turn_result.get("targeting")
-            cancelled_targeting = player_turn_result.get("targeting_cancelled")
-
-            if message:
-                message_log.add_message(message)
-            if dead_entity:
-                if dead_entity == player:
-                    message, game_state = kill_player(player)
-                else:
-                    message = kill_monster(dead_entity)
-                message_log.add_message(message)
-            if item_added:
-                entities.remove(item_added)
-                game_state = GameStates.ENEMY_TURN
-            if item_consumed:
-                game_state = GameStates.ENEMY_TURN
-            if item_dropped:
-                entities.append(item_dropped)
-                game_state = GameStates.ENEMY_TURN
-            if targeting:
-                previous_game_state = GameStates.PLAYERS_TURN
-                game_state = GameStates.TARGET_MODE
-                targeting_item = targeting
-                message_log.add_message(targeting_item.item.targeting_message)
-            if cancelled_targeting:
-                game_state = previous_game_state
-                player_turn_result.get("targeting")
-
-        # After all input is handle, check if this is enemies turn
-        if game_state == GameStates.ENEMY_TURN:
-            for entity in entities:
-                if entity.ai:
-                    enemy_turn_results = entity.ai.take_turn(
-                        player, fov_map, game_map, entities
-                    )
-
-                    # Cycle through players action log
-                    for enemy_turn_result in enemy_turn_results:
-                        message = enemy_turn_result.get("message")
-                        dead_entity = enemy_turn_result.get("dead")
-
-                        if message:
-                            message_log.add_message(message)
-                        if dead_entity:
-                            if dead_entity == player:
-                                message, game_state = kill_player(player)
-                            else:
-                                message = kill_monster(dead_entity)
-                            message_log.add_message(message)
-                    # If player has died, no need to continue with enemies
-                    if game_state == GameStates.PLAYER_DEAD:
-                        break
-
+        if action.get("toggle_profiler"):
+            show_profiler = not show_profiler
+            if not show_profiler:
+                # Draw the whole map again, over the timings
+                session.game_map.dirty.mark_all()
+        if action.get("toggle_capture"):
+            path = profiler.toggle_capture(profile_path)
+            if path:
+                message = Message("Profile written to {}", libtcod.light_gray, (path,))
             else:
-                game_state = GameStates.PLAYERS_TURN
+                message = Message("Capturing a profile", libtcod.light_gray)
+            session.message_log.add_message(message)
+        profiler.enabled = profile or show_profiler or profiler.capturing
+
+        # Any input may have changed what is on screen
+        if action or mouse_action or results:
+            redraw = True
+        profiler.stop("frame", frame_start)
+
+    profiler.finish_capture()
+    session.close()
+    if recorder is not None:
+        recorder.close()
 
 
 if __name__ == "__main__":
@@ -1,14 +1,28 @@
 import math
 
-import tcod as libtcod
-
+from profiling import timed
 from render_functions import RenderOrder
 
 
-class Entity:
-    """A generic class used to represent player, npcs, enemies
+class BaseEntity:
+    """A generic class used to represent player, npcs, enemies.
+
+    Subclasses declare where the position, blocking flag and render order
+    are kept: on the object for `Entity`, in an `EntityRegistry` row for
+    `entity_registry.RegisteredEntity`.
     """
 
+    __slots__ = (
+        "char",
+        "color",
+        "name",
+        "fighter",
+        "ai",
+        "item",
+        "inventory",
+        "game_map",
+    )
+
     def __init__(
         self,
         x: int,
@@ -50,6 +64,7 @@ class Entity:
         self.ai = ai
         self.item = item
         self.inventory = inventory
+        self.game_map = None  # Set by the GameMap tracking this entity
 
         # If components are present, set this entity as owner
         if self.fighter:
@@ -68,8 +83,11 @@ class Entity:
             dx {int} -- adjustment on X axis
             dy {int} -- adjustment on Y axis
         """
-        self.x += dx
-        self.y += dy
+        if self.game_map is not None:
+            self.game_map.move_entity(self, self.x + dx, self.y + dy)
+        else:
+            self.x += dx
+            self.y += dy
 
     def move_towards(
         self, target_x: int, target_y: int, game_map: object, entities: list
@@ -91,10 +109,11 @@ class Entity:
 
         if not (
             game_map.is_blocked(self.x + dx, self.y + dy)
-            or get_blocking_entities_at_location(entities, self.x + dx, self.y + dy)
+            or game_map.get_blocking_entity_at(self.x + dx, self.y + dy)
         ):
             self.move(dx, dy)
 
+    @timed("move_astar")
     def move_astar(self, target: object, game_map: object, entities: list):
         """Use A* algorithm to move towards a target
         
@@ -103,52 +122,68 @@ class Entity:
             game_map {object} -- Gamemap object
             entities {list} -- list of entities in the map
         """
-        # Create a FOV map that has the dimensions of the map
-        fov = libtcod.map.Map(game_map.width, game_map.height)
-
-        # Scan the current map each turn and set all the walls as unwalkable
-        for y1 in range(game_map.height):
-            for x1 in range(game_map.width):
-                libtcod.map_set_properties(
-                    fov,
-                    x1,
-                    y1,
-                    not game_map.tiles[x1][y1].block_sight,
-                    not game_map.tiles[x1][y1].blocked,
-                )
-
-        # Scan all the objects to see if there are objects that must be navigated around
-        # Check also that the object isn't self or the target (so that the start and the end points are free)
-        # The AI class handles the situation if self is next to the target so it will not use this A* function anyway
-        for entity in entities:
-            if entity.blocks and entity != self and entity != target:
-                # Set the tile as a wall so it must be navigated around
-                libtcod.map_set_properties(fov, entity.x, entity.y, True, False)
+        if game_map.pathfinder is None:
+            game_map.initialize_navigation()
 
-        # Allocate a A* path
-        # The 1.41 is the normal diagonal cost of moving, it can be set as 0.0 if diagonal moves are prohibited
-        my_path = libtcod.path_new_using_map(fov, 1.41)
+        # Blocking entities are already marked on the navigation grid, but self and
+        # the target must be free so that the start and the end points are reachable
+        # The AI class handles the situation if self is next to the target so it will not use this A* function anyway
+        nav_walkable = game_map.nav_map.walkable
+        nav_walkable[self.x, self.y] = game_map.walkable[self.x, self.y]
+        nav_walkable[target.x, target.y] = game_map.walkable[target.x, target.y]
 
         # Compute the path between self's coordinates and the target's coordinates
-        libtcod.path_compute(my_path, self.x, self.y, target.x, target.y)
+        path = game_map.pathfinder.get_path(self.x, self.y, target.x, target.y)
+
+        # Put the overlay back the way it was
+        game_map.refresh_navigation_cell(self.x, self.y)
+        game_map.refresh_navigation_cell(target.x, target.y)
 
         # Check if the path exists, and in this case, also the path is shorter than 25 tiles
         # The path size matters if you want the monster to use alternative longer paths (for example through other rooms) if for example the player is in a corridor
         # It makes sense to keep path size relatively low to keep the monsters from running around the map if there's an alternative path really far away
-        if not libtcod.path_is_empty(my_path) and libtcod.path_size(my_path) < 25:
-            # Find the next coordinates in the computed full path
-            x, y = libtcod.path_walk(my_path, True)
-            if x or y:
-                # Set self's coordinates to the next path tile
-                self.x = x
-                self.y = y
+        if path and len(path) < 25:
+            # Step onto the next tile of the computed path
+            x, y = path[0]
+            self.move(x - self.x, y - self.y)
         else:
             # Keep the old move function as a backup so that if there are no paths (for example another monster blocks a corridor)
             # it will still try to move towards the player (closer to the corridor opening)
             self.move_towards(target.x, target.y, game_map, entities)
 
-            # Delete the path to free memory
-        libtcod.path_delete(my_path)
+    def move_downhill(self, game_map: object) -> bool:
+        """Step to the free neighbouring tile closest to the flow field's target
+        
+        Arguments:
+            game_map {object} -- GameMap object with a computed flow field
+        
+        Returns:
+            bool -- True if the entity moved, False if there was no better free tile
+        """
+        flow_distance = game_map.flow_distance
+        target_x, target_y = game_map.flow_target
+        best = None
+        best_key = (flow_distance(self.x, self.y), 0)
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                x, y = self.x + dx, self.y + dy
+                if (
+                    (dx == 0 and dy == 0)
+                    or not (0 <= x < game_map.width and 0 <= y < game_map.height)
+                    or game_map.blockers[x, y]
+                ):
+                    continue
+                # Closer to the target on the flow field first, then in a straight line
+                key = (flow_distance(x, y), (target_x - x) ** 2 + (target_y - y) ** 2)
+                if key < best_key:
+                    best, best_key = (dx, dy), key
+
+        if best is None:
+            return False
+
+        self.move(*best)
+        return True
 
     def distance(self, x: int, y: int) -> float:
         return math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2)
@@ -167,9 +202,8 @@ class Entity:
         return math.sqrt(dx ** 2 + dy ** 2)
 
 
-def get_blocking_entities_at_location(entities, destination_x, destination_y):
-    for entity in entities:
-        if entity.blocks and entity.x == destination_x and entity.y == destination_y:
-            return entity
+class Entity(BaseEntity):
+    """Entity keeping its position, blocking flag and render order itself
+    """
 
-    return None
+    __slots__ = ("x", "y", "blocks", "render_order")
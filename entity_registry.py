@@ -0,0 +1,215 @@
+import numpy as np
+
+from components.fighter import BaseFighter, Fighter
+from entity import BaseEntity
+from render_functions import RenderOrder
+
+
+class EntityRegistry:
+    """Struct-of-arrays storage for per-entity state.
+
+    Positions, HP, blocking flags and render order of every registered entity
+    live in parallel NumPy arrays, one row per entity, so they can be read
+    and updated for all entities at once. The entities themselves become thin
+    handles over their row (see `RegisteredEntity`).
+
+    A row belongs to its entity for as long as the entity exists, corpses
+    and carried items included. Rows of destroyed entities must be given
+    back with `release`, `active` flags the rows in use.
+    """
+
+    __slots__ = (
+        "x",
+        "y",
+        "hp",
+        "max_hp",
+        "blocks",
+        "render_order",
+        "active",
+        "free_rows",
+        "size",
+    )
+
+    def __init__(self, capacity: int = 64):
+        """EntityRegistry initializer
+
+        Keyword Arguments:
+            capacity {int} -- number of rows allocated up front (default: {64})
+        """
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.hp = np.zeros(capacity, dtype=np.int32)
+        self.max_hp = np.zeros(capacity, dtype=np.int32)
+        self.blocks = np.zeros(capacity, dtype=bool)
+        self.render_order = np.zeros(capacity, dtype=np.int8)
+        self.active = np.zeros(capacity, dtype=bool)  # row is in use
+        self.free_rows = []  # released rows, reused before growing
+        self.size = 0  # rows handed out so far
+
+    def __len__(self) -> int:
+        return self.size - len(self.free_rows)
+
+    def allocate(self) -> int:
+        """Reserve a row for a new entity
+
+        Returns:
+            int -- row index
+        """
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.size == len(self.active):
+                self._grow()
+            row = self.size
+            self.size += 1
+        self.active[row] = True
+        return row
+
+    def release(self, entity: object):
+        """Free the row of an entity that no longer exists.
+
+        The entity must not be used afterwards, its row will be handed out
+        to another entity.
+
+        Arguments:
+            entity {RegisteredEntity} -- entity to be released
+        """
+        row = entity.row
+        if not self.active[row]:
+            return
+        self.active[row] = False
+        self.blocks[row] = False
+        self.hp[row] = self.max_hp[row] = 0
+        self.free_rows.append(row)
+
+    def create(
+        self,
+        x: int,
+        y: int,
+        char: str,
+        color: object,
+        name: str,
+        fighter: Fighter = None,
+        **kwargs
+    ) -> object:
+        """Create an entity stored in this registry.
+
+        Takes the same arguments as `Entity`. A given `fighter` component is
+        only used for its stats, the entity gets a `RegisteredFighter` instead.
+
+        Returns:
+            RegisteredEntity -- the new entity
+        """
+        row = self.allocate()
+        if fighter is not None:
+            fighter = RegisteredFighter(
+                self, row, fighter.max_hp, fighter.defense, fighter.atk_power
+            )
+        return RegisteredEntity(
+            self, row, x, y, char, color, name, fighter=fighter, **kwargs
+        )
+
+    def _grow(self):
+        """Double the capacity of every column
+        """
+        for column in ("x", "y", "hp", "max_hp", "blocks", "render_order", "active"):
+            array = getattr(self, column)
+            grown = np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[: len(array)] = array
+            setattr(self, column, grown)
+
+
+# Avoids going through the Enum machinery on every render_order read
+_RENDER_ORDERS = {order.value: order for order in RenderOrder}
+
+
+class RegisteredEntity(BaseEntity):
+    """Entity whose position, blocking flag and render order live in an
+    `EntityRegistry` row
+    """
+
+    __slots__ = ("registry", "row")
+
+    def __init__(self, registry: EntityRegistry, row: int, *args, **kwargs):
+        """RegisteredEntity initializer
+
+        Arguments:
+            registry {EntityRegistry} -- registry holding the entity's state
+            row {int} -- row reserved for this entity
+
+        Any other argument is passed on to `BaseEntity`.
+        """
+        self.registry = registry
+        self.row = row
+        super().__init__(*args, **kwargs)
+
+    @property
+    def x(self) -> int:
+        return int(self.registry.x[self.row])
+
+    @x.setter
+    def x(self, value: int):
+        self.registry.x[self.row] = value
+
+    @property
+    def y(self) -> int:
+        return int(self.registry.y[self.row])
+
+    @y.setter
+    def y(self, value: int):
+        self.registry.y[self.row] = value
+
+    @property
+    def blocks(self) -> bool:
+        return bool(self.registry.blocks[self.row])
+
+    @blocks.setter
+    def blocks(self, value: bool):
+        self.registry.blocks[self.row] = value
+
+    @property
+    def render_order(self) -> RenderOrder:
+        return _RENDER_ORDERS[self.registry.render_order[self.row]]
+
+    @render_order.setter
+    def render_order(self, value: RenderOrder):
+        self.registry.render_order[self.row] = value.value
+
+
+class RegisteredFighter(BaseFighter):
+    """Fighter whose HP live in an `EntityRegistry` row
+    """
+
+    __slots__ = ("registry", "row")
+
+    def __init__(
+        self, registry: EntityRegistry, row: int, hp: int, defense: int, power: int
+    ):
+        """RegisteredFighter initializer
+
+        Arguments:
+            registry {EntityRegistry} -- registry holding the HP
+            row {int} -- row of the owner entity
+            hp {int} -- Health points
+            defense {int} -- Damage mitigation
+            power {int} -- Attack strength
+        """
+        self.registry = registry
+        self.row = row
+        super().__init__(hp, defense, power)
+
+    @property
+    def hp(self) -> int:
+        return int(self.registry.hp[self.row])
+
+    @hp.setter
+    def hp(self, value: int):
+        self.registry.hp[self.row] = value
+
+    @property
+    def max_hp(self) -> int:
+        return int(self.registry.max_hp[self.row])
+
+    @max_hp.setter
+    def max_hp(self, value: int):
+        self.registry.max_hp[self.row] = value
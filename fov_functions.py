@@ -1,8 +1,9 @@
+import numpy as np
 import tcod as libtcod
 
 
 def initialize_fov(game_map: object) -> libtcod.map.Map:
-    """Initialize the FoV map to block sight of all objects
+    """Initialize the FoV map from the GameMap's tile arrays
     
     Arguments:
         game_map {object} -- GameMap object
@@ -10,20 +11,35 @@ def initialize_fov(game_map: object) -> libtcod.map.Map:
     Returns:
         libtcod.map.Map -- FoV map
     """
-    fov_map = libtcod.map.Map(game_map.width, game_map.height)
-
-    for y in range(game_map.height):
-        for x in range(game_map.width):
-            libtcod.map_set_properties(
-                fov_map,
-                x,
-                y,
-                not game_map.tiles[x][y].block_sight,
-                not game_map.tiles[x][y].blocked,
-            )
+    # Use [x, y] ordering so the arrays line up with the GameMap ones
+    fov_map = libtcod.map.Map(game_map.width, game_map.height, order="F")
+
+    fov_map.transparent[...] = game_map.transparent
+    fov_map.walkable[...] = game_map.walkable
+
     return fov_map
 
 
+def update_fov_tiles(fov_map: libtcod.map.Map, game_map: object, changed_cells: list):
+    """Copy the state of only the given tiles into an existing FoV map.
+
+    Use this instead of `initialize_fov` after a small change on the map,
+    like a door opening or a wall being dug.
+    
+    Arguments:
+        fov_map {libtcod.map.Map} -- FoV map created by `initialize_fov`
+        game_map {object} -- GameMap object
+        changed_cells {list} -- (x, y) positions of the tiles that changed
+    """
+    if not changed_cells:
+        return
+
+    xs, ys = np.asarray(changed_cells, dtype=np.intp).reshape(-1, 2).T
+
+    fov_map.transparent[xs, ys] = game_map.transparent[xs, ys]
+    fov_map.walkable[xs, ys] = game_map.walkable[xs, ys]
+
+
 def recompute_fov(
     fov_map: libtcod.map.Map,
     x: int,
@@ -0,0 +1,144 @@
+class Dead:
+    """An entity ran out of HP
+    """
+
+    __slots__ = ("entity",)
+
+    def __init__(self, entity: object):
+        """Dead initializer
+
+        Arguments:
+            entity {object} -- entity that died
+        """
+        self.entity = entity
+
+
+class Damaged:
+    """An entity took damage
+    """
+
+    __slots__ = ("entity", "amount", "source")
+
+    def __init__(self, entity: object, amount: int, source: object):
+        """Damaged initializer
+
+        Arguments:
+            entity {object} -- entity that was hurt
+            amount {int} -- damage dealt
+            source {object} -- entity that dealt the damage
+        """
+        self.entity = entity
+        self.amount = amount
+        self.source = source
+
+
+class ItemAdded:
+    """An item was picked up into an inventory
+    """
+
+    __slots__ = ("item",)
+
+    def __init__(self, item: object):
+        """ItemAdded initializer
+
+        Arguments:
+            item {object} -- item entity, to be taken off the map
+        """
+        self.item = item
+
+
+class ItemConsumed:
+    """An item was used up
+    """
+
+    __slots__ = ("item",)
+
+    def __init__(self, item: object = None):
+        """ItemConsumed initializer
+
+        Keyword Arguments:
+            item {object} -- item entity, filled in by the inventory using it (default: {None})
+        """
+        self.item = item
+
+
+class ItemDropped:
+    """An item was dropped from an inventory
+    """
+
+    __slots__ = ("item",)
+
+    def __init__(self, item: object):
+        """ItemDropped initializer
+
+        Arguments:
+            item {object} -- item entity, to be put back on the map
+        """
+        self.item = item
+
+
+class Targeting:
+    """An item needs a target before it can be used
+    """
+
+    __slots__ = ("item",)
+
+    def __init__(self, item: object):
+        """Targeting initializer
+
+        Arguments:
+            item {object} -- item entity waiting for a target
+        """
+        self.item = item
+
+
+class TargetingCancelled:
+    """The player gave up on selecting a target
+    """
+
+    __slots__ = ()
+
+
+class EventDispatcher:
+    """Handler registry for game events.
+
+    Actions return lists of event objects (these classes, plus
+    `game_messages.Message`). The dispatcher calls the handlers registered
+    for the exact type of each event, in registration order.
+    """
+
+    __slots__ = ("handlers",)
+
+    def __init__(self):
+        """EventDispatcher initializer
+        """
+        self.handlers = {}  # event type -> list of handlers
+
+    def register(self, event_type: type, handler: object):
+        """Call `handler(event)` for every dispatched event of a type
+
+        Arguments:
+            event_type {type} -- class of the events to handle
+            handler {callable} -- function receiving the event
+        """
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def dispatch(self, event: object):
+        """Pass an event to its handlers. Events without handlers are ignored
+
+        Arguments:
+            event {object} -- event to be handled
+        """
+        for handler in self.handlers.get(type(event), ()):
+            handler(event)
+
+    def dispatch_all(self, events: list):
+        """Pass every event of an action log to its handlers, in order
+
+        Arguments:
+            events {list} -- events to be handled
+        """
+        handlers = self.handlers
+        for event in events:
+            for handler in handlers.get(type(event), ()):
+                handler(event)
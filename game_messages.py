@@ -1,55 +1,124 @@
 import textwrap
+from collections import deque
 
 import tcod as libtcod
 
+from profiling import timed
+
 
 class Message:
     """Message class. Holds game message definitions
+
+    The text is kept as a `str.format` template and its arguments, and is
+    only formatted (then cached) the first time it is read, so messages
+    nobody displays cost almost nothing.
     """
 
-    def __init__(self, text: str, color: libtcod.Color = libtcod.white):
+    __slots__ = ("template", "args", "color", "_text", "_wrapped")
+
+    def __init__(
+        self, template: str, color: libtcod.Color = libtcod.white, args: tuple = ()
+    ):
         """MEssage initializer
-        
+
         Arguments:
-            text {str} -- The text for the message
-        
+            template {str} -- The text for the message, with `{}` fields when `args` are given
+
         Keyword Arguments:
             color {libtcod.Color} -- Color to be used in rendering (default: {libtcod.white})
+            args {tuple} -- values for the template fields (default: {()})
         """
-        self.text = text
+        self.template = template
+        self.args = args
         self.color = color
+        self._text = None if args else template
+        self._wrapped = None  # (width, lines) of the last wrap
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.template.format(*self.args)
+        return self._text
+
+    def wrap(self, width: int) -> list:
+        """Split the text in lines no longer than `width`
+
+        Arguments:
+            width {int} -- maximum line length
+
+        Returns:
+            list -- lines of text
+        """
+        if self._wrapped is None or self._wrapped[0] != width:
+            self._wrapped = (width, textwrap.wrap(self.text, width=width))
+        return self._wrapped[1]
 
 
 class MessageLog:
     """MessageLog class. Holds UI message log definitions
+
+    Only the last `height` messages are kept, since every message takes at
+    least one line. They are wrapped when the log is displayed.
     """
 
-    def __init__(self, x: int, width: int, height: int):
+    def __init__(
+        self,
+        x: int,
+        width: int,
+        height: int,
+        enabled: bool = True,
+        history: object = None,
+    ):
         """MessageLog intializer
-        
+
         Arguments:
             x {int} -- x position to start rendering message log
             width {int} -- width for the message log
             height {int} -- height for the message log
+
+        Keyword Arguments:
+            enabled {bool} -- if False, messages are dropped, for headless runs (default: {True})
+            history {MessageHistory} -- where every message is also kept, for scrollback (default: {None})
         """
-        self.messages = []
+        self.messages = deque(maxlen=height)
+        self.version = 0  # bumped on every change, lets the UI skip redraws
         self.x = x
         self.width = width
         self.height = height
+        self.enabled = enabled
+        self.history = history
+        self._lines = []  # visible lines, as of `_lines_version`
+        self._lines_version = 0
 
+    @timed("add_message")
     def add_message(self, message: Message):
         """Adds new function to the log
-        
+
         Arguments:
             message {Message} -- Message object to be added to the log
-        """        
-        # Auto split text in case it overflows width attribute
-        new_msg_lines = textwrap.wrap(message.text, width=self.width)
+        """
+        if not self.enabled:
+            return
 
-        for line in new_msg_lines:
-            # If the buffer is full, use FIFO strategy to clear the buffer
-            if len(self.messages) == self.height:
-                del self.messages[0]
+        self.version += 1
+        self.messages.append(message)
+        if self.history is not None:
+            self.history.append(message)
 
-            # Add the new line as a Message object, with the text and the color
-            self.messages.append(Message(line, message.color))
+    def visible_lines(self) -> list:
+        """Lines currently shown in the log, oldest first
+
+        Returns:
+            list -- (text, color) tuples, at most `height` of them
+        """
+        if self._lines_version != self.version:
+            lines = []
+            # Wrap from the newest message back, until the log is full
+            for message in reversed(self.messages):
+                wrapped = message.wrap(self.width)
+                lines[:0] = [(line, message.color) for line in wrapped]
+                if len(lines) >= self.height:
+                    break
+            self._lines = lines[-self.height :]
+            self._lines_version = self.version
+        return self._lines
@@ -0,0 +1,520 @@
+import math
+
+import tcod as libtcod
+
+from components.fighter import Fighter
+from components.inventory import Inventory
+from death_handlers import kill_monster, kill_player
+from entity_registry import EntityRegistry
+from fov_functions import initialize_fov, recompute_fov
+from game_events import (
+    Dead,
+    EventDispatcher,
+    ItemAdded,
+    ItemConsumed,
+    ItemDropped,
+    Targeting,
+    TargetingCancelled,
+)
+from game_states import GameStates
+from game_messages import Message, MessageLog
+from map_objects.game_map import FLOW_FIELD_RANGE, GameMap
+from message_history import MessageHistory
+from profiling import profiler
+from render_functions import RenderOrder
+from rng import RandomStreams
+from turn_scheduler import ACTION_COST, TurnScheduler, action_time
+
+
+class GameSession:
+    """Headless game simulation.
+
+    Holds the whole game state (player, entities, map, FoV, message log and
+    game state) and runs the turn logic through `step`, without needing a
+    console, a window or input devices. The engine drives it with the
+    actions read from the keyboard and mouse, and renders its state.
+    """
+
+    def __init__(
+        self,
+        seed: int = None,
+        map_width: int = 80,
+        map_height: int = 43,
+        max_rooms: int = 30,
+        room_min_size: int = 6,
+        room_max_size: int = 10,
+        max_monsters_per_room: int = 3,
+        fov_algorithm: int = 0,
+        fov_light_walls: bool = True,
+        fov_radius: int = 10,
+        use_flow_field: bool = True,
+        use_registry: bool = False,
+        activation_radius: int = 15,
+        dormancy_turns: int = 5,
+        noise_radius: int = 8,
+        messages_enabled: bool = True,
+        history_path: str = None,
+        history_page_size: int = 40,
+        message_x: int = 22,
+        message_width: int = 58,
+        message_height: int = 6,
+    ):
+        """GameSession initializer. Creates the player and a new map
+
+        Keyword Arguments:
+            seed {int} -- seed of every random stream of the game, None to use the global `random` module (default: {None})
+            map_width {int} -- map width (default: {80})
+            map_height {int} -- map height (default: {43})
+            max_rooms {int} -- maximum number of rooms (default: {30})
+            room_min_size {int} -- minimum size for a room (default: {6})
+            room_max_size {int} -- maximum size for a room (default: {10})
+            max_monsters_per_room {int} -- Limit of monsters per room (default: {3})
+            fov_algorithm {int} -- which FoV algoritm to use (default: {0})
+            fov_light_walls {bool} -- light up walls we can see (default: {True})
+            fov_radius {int} -- radius of view (default: {10})
+            use_flow_field {bool} -- monsters chase the player with a shared flow field (default: {True})
+            use_registry {bool} -- keep the entities' positions, HP, blocking flags and render orders in an `EntityRegistry` (default: {False})
+            activation_radius {int} -- monsters further than this from the player may fall asleep, None to keep all awake (default: {15})
+            dormancy_turns {int} -- turns a monster must spend out of view before falling asleep (default: {5})
+            noise_radius {int} -- radius around a targeted item's impact where monsters wake up (default: {8})
+            messages_enabled {bool} -- keep a message log, turn off for headless runs nobody reads (default: {True})
+            history_path {str} -- file keeping the full message history, None to keep none (default: {None})
+            history_page_size {int} -- lines shown per page of the message history (default: {40})
+            message_x {int} -- x position to start rendering message log (default: {22})
+            message_width {int} -- width for the message log (default: {58})
+            message_height {int} -- height for the message log (default: {6})
+        """
+        # FoV configurations
+        self.fov_algorithm = fov_algorithm
+        self.fov_light_walls = fov_light_walls
+        self.fov_radius = fov_radius
+        self.fov_recompute = True  # flag to trigger FoV computations
+        self.use_flow_field = use_flow_field
+        # Monster dormancy. Only monsters out of view can act without the
+        # player seeing them, keeping the activation radius beyond the FoV
+        # radius means sleeping never changes what a monster does
+        self.activation_radius = activation_radius
+        self.dormancy_turns = dormancy_turns
+        self.noise_radius = noise_radius
+
+        # Random streams of each subsystem, all derived from the seed
+        self.seed = seed
+        self.rng = RandomStreams(seed)
+
+        # Struct-of-arrays storage of the entities' state, if enabled
+        self.registry = EntityRegistry() if use_registry else None
+
+        # Player initialization
+        fighter_component = Fighter(hp=30, defense=2, power=5)
+        inventory_component = Inventory(26)
+        # Map object
+        self.game_map = GameMap(map_width, map_height, registry=self.registry)
+        self.player = self.game_map.create_entity(
+            0,
+            0,
+            "@",
+            libtcod.white,
+            "Player",
+            blocks=True,
+            render_order=RenderOrder.ACTOR,
+            fighter=fighter_component,
+            inventory=inventory_component,
+        )
+        # World entity list
+        self.entities = [self.player]
+        self.game_map.make_map(
+            max_rooms,
+            room_min_size,
+            room_max_size,
+            self.player,
+            self.entities,
+            max_monsters_per_room=max_monsters_per_room,
+            rng=self.rng,
+        )
+        # Fov map object
+        self.fov_map = initialize_fov(self.game_map)
+        # Monsters act when the scheduler says they are due
+        self.scheduler = TurnScheduler()
+        for entity in self.entities:
+            if entity.ai:
+                if self.is_idle(entity):
+                    self.scheduler.sleep(entity)
+                else:
+                    self.scheduler.schedule(entity, action_time(entity.ai.speed))
+        # Message Log object
+        self.message_history = None
+        if history_path is not None and messages_enabled:
+            self.message_history = MessageHistory(history_path, message_width)
+        self.message_log = MessageLog(
+            message_x,
+            message_width,
+            message_height,
+            enabled=messages_enabled,
+            history=self.message_history,
+        )
+        # Message history viewer, scrolled back this many lines from the end
+        self.history_page_size = history_page_size
+        self.history_scroll = 0
+
+        # Game state
+        self.game_state = GameStates.PLAYERS_TURN
+        self.previous_game_state = self.game_state
+        # For item targeting
+        self.targeting_item = None
+        # Set when the player asks to leave the game
+        self.exit_requested = False
+
+        # What each event returned by an action does to the game
+        self.events = EventDispatcher()
+        self.events.register(Message, self.message_log.add_message)
+        self.events.register(Dead, lambda event: self.handle_death(event.entity))
+        self.events.register(ItemAdded, self.on_item_added)
+        self.events.register(ItemConsumed, self.on_item_consumed)
+        self.events.register(ItemDropped, self.on_item_dropped)
+        self.events.register(Targeting, self.on_targeting)
+        self.events.register(TargetingCancelled, self.on_targeting_cancelled)
+
+    def update_fov(self) -> bool:
+        """Recompute the player's FoV if it moved since the last computation
+
+        Returns:
+            bool -- True if the FoV was recomputed
+        """
+        if not self.fov_recompute:
+            return False
+
+        recompute_fov(
+            self.fov_map,
+            self.player.x,
+            self.player.y,
+            self.fov_radius,
+            self.fov_light_walls,
+            self.fov_algorithm,
+        )
+        self.fov_recompute = False
+        return True
+
+    def step(self, action: dict, mouse_action: dict = None) -> list:
+        """Run one iteration of the game logic for the given input.
+
+        Handles the player's action, processes its results and, if the
+        player's turn is over, lets every monster act.
+
+        Arguments:
+            action {dict} -- action, as returned by `input_handlers.handle_keys`
+
+        Keyword Arguments:
+            mouse_action {dict} -- action, as returned by `input_handlers.handle_mouse` (default: {None})
+
+        Returns:
+            list -- results of the player's and the monsters' actions
+        """
+        self.update_fov()
+
+        start = profiler.start()
+        player_turn_results = self.handle_player_action(action, mouse_action or {})
+        profiler.stop("player_action", start)
+        if self.exit_requested:
+            return []
+        start = profiler.start()
+        self.process_results(player_turn_results)
+        profiler.stop("results", start)
+
+        enemy_turn_results = []
+        # After all input is handle, check if this is enemies turn
+        if self.game_state == GameStates.ENEMY_TURN:
+            start = profiler.start()
+            enemy_turn_results = self.take_enemy_turns()
+            profiler.stop("ai", start)
+            profiler.end_turn()
+
+        return player_turn_results + enemy_turn_results
+
+    def handle_player_action(self, action: dict, mouse_action: dict) -> list:
+        """Apply the player's input to the game
+
+        Arguments:
+            action {dict} -- keyboard action
+            mouse_action {dict} -- mouse action
+
+        Returns:
+            list -- results of the player's action, not yet processed
+        """
+        player = self.player
+        game_map = self.game_map
+        # Map values for each action
+        move = action.get("move")
+        pickup = action.get("pickup")
+        show_inventory = action.get("show_inventory")
+        drop_inventory = action.get("drop_inventory")
+        inv_index = action.get("inventory_index")
+        left_click = mouse_action.get("left_click")
+        right_click = mouse_action.get("right_click")
+        show_history = action.get("show_history")
+        scroll_history = action.get("scroll_history")
+        scroll_history_page = action.get("scroll_history_page")
+        _exit = action.get("exit")
+        player_turn_results = []
+
+        # Handle movement. Check if this is players turn
+        if move and self.game_state == GameStates.PLAYERS_TURN:
+            dx, dy = move
+            dest_x, dest_y = player.x + dx, player.y + dy
+            if not game_map.is_blocked(dest_x, dest_y):
+                target = game_map.get_blocking_entity_at(dest_x, dest_y)
+                if target:
+                    self.wake(target)
+                    attack_results = player.fighter.attack(target)
+                    player_turn_results.extend(attack_results)
+                else:
+                    player.move(dx, dy)
+                    self.fov_recompute = True
+                # Now it is enemies turn
+                self.game_state = GameStates.ENEMY_TURN
+        elif pickup and self.game_state == GameStates.PLAYERS_TURN:
+            for entity in game_map.entity_index.at(player.x, player.y):
+                if entity.item:
+                    pickup_results = player.inventory.add_item(entity)
+                    player_turn_results.extend(pickup_results)
+                    break
+            else:
+                self.message_log.add_message(
+                    Message("There's nothing to pickup", color=libtcod.yellow)
+                )
+        # Show player inventory
+        if show_inventory:
+            self.previous_game_state = self.game_state
+            self.game_state = GameStates.SHOW_INVENTORY
+        # Drop item dialog
+        if drop_inventory:
+            self.previous_game_state = self.game_state
+            self.game_state = GameStates.DROP_INVENTORY
+        if (
+            inv_index is not None
+            and self.previous_game_state != GameStates.PLAYER_DEAD
+            and inv_index < len(player.inventory.items)
+        ):
+            item = player.inventory.items[inv_index]
+            if self.game_state == GameStates.SHOW_INVENTORY:
+                player_turn_results.extend(
+                    player.inventory.use(
+                        item,
+                        entities=self.entities,
+                        fov_map=self.fov_map,
+                        game_map=game_map,
+                        rng=self.rng,
+                    )
+                )
+            elif self.game_state == GameStates.DROP_INVENTORY:
+                player_turn_results.extend(player.inventory.drop_item(item))
+        # Message history viewer
+        if show_history and self.message_history is not None:
+            self.previous_game_state = self.game_state
+            self.game_state = GameStates.MESSAGE_HISTORY
+            self.history_scroll = 0
+        if self.game_state == GameStates.MESSAGE_HISTORY:
+            if scroll_history:
+                self.scroll_history(scroll_history)
+            if scroll_history_page:
+                self.scroll_history(scroll_history_page * self.history_page_size)
+        if self.game_state == GameStates.TARGET_MODE:
+            if left_click:
+                target_x, target_y = left_click
+
+                item_use_results = player.inventory.use(
+                    self.targeting_item,
+                    entities=self.entities,
+                    fov_map=self.fov_map,
+                    game_map=game_map,
+                    rng=self.rng,
+                    target_x=target_x,
+                    target_y=target_y,
+                )
+                if any(isinstance(result, ItemConsumed) for result in item_use_results):
+                    self.make_noise(target_x, target_y, self.noise_radius)
+
+                player_turn_results.extend(item_use_results)
+            elif right_click:
+                player_turn_results.append(TargetingCancelled())
+        # Handle game exit
+        if _exit:
+            if self.game_state in (
+                GameStates.SHOW_INVENTORY,
+                GameStates.DROP_INVENTORY,
+                GameStates.MESSAGE_HISTORY,
+            ):
+                self.game_state = self.previous_game_state
+            elif self.game_state == GameStates.TARGET_MODE:
+                player_turn_results.append(TargetingCancelled())
+            else:
+                self.exit_requested = True
+
+        return player_turn_results
+
+    def scroll_history(self, lines: int):
+        """Move the message history viewer, staying within the history
+
+        Arguments:
+            lines {int} -- lines to move, negative towards older messages
+        """
+        last_page = max(0, len(self.message_history) - self.history_page_size)
+        self.history_scroll = min(max(self.history_scroll - lines, 0), last_page)
+
+    def close(self):
+        """Release the resources held by the session
+        """
+        if self.message_history is not None:
+            self.message_history.close()
+
+    def process_results(self, player_turn_results: list):
+        """Cycle through the player's action log, applying each result
+
+        Arguments:
+            player_turn_results {list} -- results of the player's action
+        """
+        self.events.dispatch_all(player_turn_results)
+
+    def on_item_added(self, event: ItemAdded):
+        """Take a picked up item off the map
+        """
+        self.entities.remove(event.item)
+        self.game_map.remove_entity(event.item)
+        self.game_state = GameStates.ENEMY_TURN
+
+    def on_item_consumed(self, event: ItemConsumed):
+        """Using up an item ends the player's turn
+        """
+        if self.registry is not None:
+            # The item is gone for good
+            self.registry.release(event.item)
+        self.game_state = GameStates.ENEMY_TURN
+
+    def on_item_dropped(self, event: ItemDropped):
+        """Put a dropped item back on the map
+        """
+        self.entities.append(event.item)
+        self.game_map.add_entity(event.item)
+        self.game_state = GameStates.ENEMY_TURN
+
+    def on_targeting(self, event: Targeting):
+        """Wait for the player to pick a target for an item
+        """
+        self.previous_game_state = GameStates.PLAYERS_TURN
+        self.game_state = GameStates.TARGET_MODE
+        self.targeting_item = event.item
+        self.message_log.add_message(self.targeting_item.item.targeting_message)
+
+    def on_targeting_cancelled(self, event: TargetingCancelled):
+        """Leave targeting mode without using the item
+        """
+        self.game_state = self.previous_game_state
+
+    def take_enemy_turns(self) -> list:
+        """Let every monster due before the end of the player's action act,
+        then give the turn back to the player
+
+        Returns:
+            list -- results of the monsters' actions
+        """
+        results = []
+        # The player's action takes the same time as a normal speed action
+        turn_end = self.scheduler.time + ACTION_COST
+        # Wake up the sleeping monsters the player came close to
+        if self.activation_radius is not None:
+            self.make_noise(self.player.x, self.player.y, self.activation_radius)
+        if self.use_flow_field:
+            self.update_flow_field()
+
+        while True:
+            entity = self.scheduler.pop_due(turn_end)
+            if entity is None:
+                break
+
+            enemy_turn_results = entity.ai.take_turn(
+                self.player, self.fov_map, self.game_map, self.entities
+            )
+
+            # Cycle through enemies action log
+            self.events.dispatch_all(enemy_turn_results)
+            results.extend(enemy_turn_results)
+
+            if entity.ai:
+                if self.is_idle(entity):
+                    self.scheduler.sleep(entity)
+                else:
+                    self.scheduler.schedule(entity, action_time(entity.ai.speed))
+            # If player has died, no need to continue with enemies
+            if self.game_state == GameStates.PLAYER_DEAD:
+                return results
+
+        self.scheduler.advance_to(turn_end)
+        self.game_state = GameStates.PLAYERS_TURN
+
+        return results
+
+    def update_flow_field(self):
+        """Recompute the flow field towards the player if it moved, and some
+        awake monster is close enough to follow it
+        """
+        player, game_map = self.player, self.game_map
+        if game_map.flow_target == (player.x, player.y):
+            return
+        # The field covers a square around the player, reach its corners
+        for entity in game_map.entity_index.within_radius(
+            player.x, player.y, FLOW_FIELD_RANGE * math.sqrt(2)
+        ):
+            if entity.ai and entity not in self.scheduler.dormant:
+                game_map.compute_flow_field(player.x, player.y)
+                return
+
+    def is_idle(self, entity: object) -> bool:
+        """Check if a monster is out of view and far enough from the player
+        to be put to sleep
+
+        Arguments:
+            entity {object} -- monster that just acted
+
+        Returns:
+            bool -- True if the monster can go dormant
+        """
+        return (
+            self.activation_radius is not None
+            and entity.ai.turns_unseen >= self.dormancy_turns
+            and entity.distance_to(self.player) > self.activation_radius
+        )
+
+    def wake(self, entity: object):
+        """Put a sleeping monster back in the turn order
+
+        Arguments:
+            entity {object} -- monster to be woken up
+        """
+        if entity.ai:
+            self.scheduler.wake(entity, action_time(entity.ai.speed))
+
+    def make_noise(self, x: int, y: int, radius: int):
+        """Wake up every sleeping monster within `radius` of a position
+
+        Arguments:
+            x {int} -- x position of the noise
+            y {int} -- y position of the noise
+            radius {int} -- how far the noise carries
+        """
+        if not self.scheduler.dormant:
+            return
+        for entity in self.game_map.entity_index.within_radius(x, y, radius):
+            self.wake(entity)
+
+    def handle_death(self, dead_entity: object):
+        """Apply the death of an entity, logging its death message
+
+        Arguments:
+            dead_entity {object} -- entity that died
+        """
+        if dead_entity == self.player:
+            message, self.game_state = kill_player(self.player)
+        else:
+            message = kill_monster(dead_entity)
+            # Corpses no longer act
+            self.scheduler.remove(dead_entity)
+        self.message_log.add_message(message)
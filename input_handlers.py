@@ -4,6 +4,12 @@ from game_states import GameStates
 
 
 def handle_keys(key: libtcod.Key, game_state: GameStates) -> dict:
+    # Profiler keys work in every state
+    if key.vk == libtcod.KEY_F3:
+        return {"toggle_profiler": True}
+    elif key.vk == libtcod.KEY_F4:
+        return {"toggle_capture": True}
+
     if game_state == GameStates.PLAYERS_TURN:
         return handle_player_turn_keys(key)
     elif game_state == GameStates.PLAYER_DEAD:
@@ -12,6 +18,8 @@ def handle_keys(key: libtcod.Key, game_state: GameStates) -> dict:
         return handle_targeting_keys(key)
     elif game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY):
         return handle_inventory_keys(key)
+    elif game_state == GameStates.MESSAGE_HISTORY:
+        return handle_message_history_keys(key)
     # No valid key was pressed
     return {}
 
@@ -54,6 +62,9 @@ def handle_player_turn_keys(key: libtcod.Key()) -> dict:
     # Drop inventory
     elif key_ch == "d":
         return {"drop_inventory": True}
+    # Message history
+    elif key_ch == "v":
+        return {"show_history": True}
 
     if key.vk == libtcod.KEY_ENTER and key.lalt:
         # Alt+Enter: toggle full screen
@@ -81,6 +92,9 @@ def handle_player_dead_keys(key: libtcod.Key()) -> dict:
     # Show inventory
     if key_ch == "i":
         return {"show_inventory": True}
+    # Message history
+    elif key_ch == "v":
+        return {"show_history": True}
 
     if key.vk == libtcod.KEY_ENTER and key.lalt:
         # Alt+Enter: toggle full screen
@@ -94,6 +108,38 @@ def handle_player_dead_keys(key: libtcod.Key()) -> dict:
     return {}
 
 
+def handle_message_history_keys(key: libtcod.Key) -> dict:
+    """Handler for any keypress while paging through the message history
+
+    Arguments:
+        key {libtcod.Key} -- object containing keypress data
+
+    Returns:
+        dict -- dictionary describing action for input
+    """
+    key_ch = chr(key.c)  # capture key character
+    # Scroll one line, or one page, towards older (-) or newer (+) messages
+    if key.vk == libtcod.KEY_UP or key_ch == "k":
+        return {"scroll_history": -1}
+    elif key.vk == libtcod.KEY_DOWN or key_ch == "j":
+        return {"scroll_history": 1}
+    elif key.vk == libtcod.KEY_PAGEUP:
+        return {"scroll_history_page": -1}
+    elif key.vk == libtcod.KEY_PAGEDOWN:
+        return {"scroll_history_page": 1}
+
+    if key.vk == libtcod.KEY_ENTER and key.lalt:
+        # Alt+Enter: toggle full screen
+        return {"fullscreen": True}
+
+    elif key.vk == libtcod.KEY_ESCAPE or key_ch == "v":
+        # Close the history
+        return {"exit": True}
+
+    # No valid key was pressed
+    return {}
+
+
 def handle_inventory_keys(key: libtcod.Key()) -> dict:
     """Handler for any keypress when opening inventory
     
@@ -134,16 +180,21 @@ def handle_targeting_keys(key:libtcod.Key) ->dict:
         return {'exit': True}
     return {}
 
-def handle_mouse(mouse:libtcod.Mouse)->dict:
+def handle_mouse(mouse:libtcod.Mouse, camera: object = None)->dict:
     """Hendle mouse clicks
     
     Arguments:
         mouse {libtcod.Mouse} -- mouse listener object
+
+    Keyword Arguments:
+        camera {Camera} -- view over the map, clicks are converted to map positions (default: {None})
     
     Returns:
         dict -- mouse actions
     """    
     (x, y) = (mouse.cx, mouse.cy)
+    if camera is not None:
+        x, y = camera.to_world(x, y)
     if mouse.lbutton_pressed:
         return {'left_click': (x, y)}
     elif mouse.rbutton_pressed:
@@ -1,6 +1,7 @@
 import tcod as libtcod
 
 from components.ai import ConfusedMonster
+from game_events import Damaged, ItemConsumed
 from game_messages import Message
 
 
@@ -16,50 +17,17 @@ def heal(*args, **kwargs) -> list:
     results = []
 
     if entity.fighter.hp == entity.fighter.max_hp:
-        results.append(
-            {
-                "consumed": False,
-                "message": Message("You are already at full health", libtcod.yellow),
-            }
-        )
+        results.append(Message("You are already at full health", libtcod.yellow))
     else:
         entity.fighter.heal(amount)
-        results.append(
-            {
-                "consumed": True,
-                "message": Message("Your wounds start to fell better", libtcod.green),
-            }
-        )
+        results.append(Message("Your wounds start to fell better", libtcod.green))
+        results.append(ItemConsumed())
     return results
 
 
-def get_closest_entity(
-    origin: object, entities: list, max_range: int
-) -> object or None:
-    """Utility function to get closest entity given an origin entity
-    
-    Arguments:
-        origin {object} -- origin entity
-        entities {list} -- list of possible entities 
-        max_range {int} -- Maximum range for entity detection
-    
-    Returns:
-        object or None -- Closest entity, none if no entity is close enough 
-    """
-    target = None
-    closest_distance = max_range + 1
-
-    for entity in entities:
-        distance = origin.distance_to(entity)
-        if distance < closest_distance:
-            target = entity
-            closest_distance = distance
-    return target
-
-
 def cast_lighting(*args, **kwargs) -> list:
     caster = args[0]  # point of origin
-    entities = kwargs.get("entities")  # list of possible entities
+    game_map = kwargs.get("game_map")  # GameMap, to find possible entities
     fov_map = kwargs.get("fov_map")  # FOV map for target selection
     damage = kwargs.get("damage")  # spell damage
     maximum_range = kwargs.get("maximum_range")  # maximum range for the spell
@@ -68,37 +36,29 @@ def cast_lighting(*args, **kwargs) -> list:
 
     # The only possible entities for targeting are ones
     # with fighting capabilities in the caster's FoV
-    possible_targets = [
-        entity
-        for entity in entities
-        if (
+    target = game_map.entity_index.nearest(
+        caster.x,
+        caster.y,
+        maximum_range,
+        predicate=lambda entity: (
             entity.fighter
             and entity != caster
             and libtcod.map_is_in_fov(fov_map, entity.x, entity.y)
-        )
-    ]
-
-    target = get_closest_entity(caster, possible_targets, maximum_range)
+        ),
+    )
 
     if target:
         results.append(
-            {
-                "consumed": True,
-                "target": target,
-                "message": Message(
-                    f"A lighting bolt strikes the {target.name} with a loud thunder! The damage is {damage}"
-                ),
-            }
+            Message(
+                "A lighting bolt strikes the {} with a loud thunder! The damage is {}",
+                args=(target.name, damage),
+            )
         )
+        results.append(ItemConsumed())
+        results.append(Damaged(target, damage, caster))
         results.extend(target.fighter.take_damage(damage))
     else:
-        results.append(
-            {
-                "consumed": False,
-                "target": None,
-                "message": Message("No enemy is close enough to strike.", libtcod.red),
-            }
-        )
+        results.append(Message("No enemy is close enough to strike.", libtcod.red))
 
     return results
 
@@ -111,7 +71,8 @@ def cast_fireball(*args, **kwargs) -> list:
     Returns:
         list -- results of the item usage
     """
-    entities = kwargs.get("entities")  # available entities
+    caster = args[0]  # who cast the fireball
+    game_map = kwargs.get("game_map")  # GameMap, to find available entities
     fov_map = kwargs.get("fov_map")  # Field of vision
     damage = kwargs.get("damage")  # Damage for the fireball
     radius = kwargs.get("radius")  # Explosion radius
@@ -123,87 +84,72 @@ def cast_fireball(*args, **kwargs) -> list:
     # If we are targeting something outiside FoV, do not consume the item
     if not libtcod.map_is_in_fov(fov_map, target_x, target_y):
         results.append(
-            {
-                "consumed": False,
-                "message": Message(
-                    "You cannot target something you can't see.", libtcod.yellow
-                ),
-            }
+            Message("You cannot target something you can't see.", libtcod.yellow)
         )
         return results
 
     # Else, target the tile and let it explode
     results.append(
-        {
-            "consumed": True,
-            "message": Message(
-                f"The fireball explodes, burning everything within {radius} tiles!",
-                libtcod.orange,
-            ),
-        }
+        Message(
+            "The fireball explodes, burning everything within {} tiles!",
+            libtcod.orange,
+            (radius,),
+        )
     )
+    results.append(ItemConsumed())
 
     # If any entities are inside the explosion radious, process the damage
-    for entity in entities:
-        if entity.distance(target_x, target_y) <= radius and entity.fighter:
+    explosion, x, y = game_map.radius_mask(target_x, target_y, radius)
+    for entity in game_map.entity_index.in_mask(explosion, x, y):
+        if entity.fighter:
             results.append(
-                {
-                    "message": Message(
-                        f"The {entity.name} gets burned for {damage} hit points.",
-                        libtcod.orange,
-                    )
-                }
+                Message(
+                    "The {} gets burned for {} hit points.",
+                    libtcod.orange,
+                    (entity.name, damage),
+                )
             )
+            results.append(Damaged(entity, damage, caster))
             results.extend(entity.fighter.take_damage(damage))
 
     return results
 
 
 def cast_confusion(*args, **kwargs) -> list:
-    entities = kwargs.get("entities")  # Entity list
+    game_map = kwargs.get("game_map")  # GameMap, to find the target
     fov_map = kwargs.get("fov_map")  # field of view
     target_x = kwargs.get("target_x")  # target x position
     target_y = kwargs.get("target_y")  # Target y position
+    rng = kwargs.get("rng")  # RandomStreams of the session, if any
 
     results = []
 
     if not libtcod.map_is_in_fov(fov_map, target_x, target_y):
         results.append(
-            {
-                "consumed": False,
-                "message": Message(
-                    "You cannot target something you can't see.", libtcod.yellow
-                ),
-            }
+            Message("You cannot target something you can't see.", libtcod.yellow)
         )
         return results
 
-    for entity in entities:
-        if entity.x == target_x and entity.y == target_y and entity.ai:
-            confused_ai = ConfusedMonster(entity.ai, 10)
+    for entity in game_map.entity_index.at(target_x, target_y):
+        if entity.ai:
+            confused_ai = ConfusedMonster(entity.ai, 10, rng=rng.ai if rng else None)
 
             confused_ai.owner = entity
             entity.ai = confused_ai
 
             results.append(
-                {
-                    "consumed": True,
-                    "message": Message(
-                        f"The eyes of the {entity.name} look vacant, as he starts to stumble around!",
-                        libtcod.light_green,
-                    ),
-                }
+                Message(
+                    "The eyes of the {} look vacant, as he starts to stumble around!",
+                    libtcod.light_green,
+                    (entity.name,),
+                )
             )
+            results.append(ItemConsumed())
 
             break
     else:
         results.append(
-            {
-                "consumed": False,
-                "message": Message(
-                    "There is no targetable enemy at that location.", libtcod.yellow
-                ),
-            }
+            Message("There is no targetable enemy at that location.", libtcod.yellow)
         )
 
     return results
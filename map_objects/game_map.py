@@ -1,5 +1,6 @@
-from random import randint
+import random
 
+import numpy as np
 import tcod as libtcod
 
 from components.ai import BasicMonster
@@ -8,36 +9,73 @@ from components.item import Item
 from entity import Entity
 from game_messages import Message
 from item_functions import cast_confusion, cast_fireball, cast_lighting, heal
-from map_objects.tile import Tile
+from map_objects.tile import TileGrid
+from dirty_regions import DirtyRegions
 from map_objects.room import Room
+from map_objects.spatial_index import SpatialIndex
 from render_functions import RenderOrder
+from rng import RandomStreams
+
+# Steps around its target a flow field covers. Monsters only follow it for
+# the 25 steps `Entity.move_astar` allows, further tiles are never read
+FLOW_FIELD_RANGE = 25
+FLOW_UNREACHED = np.iinfo(np.int32).max
 
 
 class GameMap:
     """GameMap class. instantiate a GameMap with a tile grid
+
+    Tile state is stored as contiguous boolean arrays indexed by `[x, y]`
+    (`walkable`, `transparent` and `explored`). `tiles[x][y]` is kept as a
+    view over those arrays for code that works with single tiles.
     """
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, registry: object = None):
         """GameMap initializer
         
         Arguments:
             width {int} -- map width
             height {int} -- map height
+
+        Keyword Arguments:
+            registry {EntityRegistry} -- if given, spawned entities store their state in it (default: {None})
         """
         self.width = width
         self.height = height
+        self.registry = registry
         self.tiles = self.initialize_tiles()
+        # Entities by position, and number of blocking entities on each tile
+        self.entity_index = SpatialIndex()
+        self.blockers = np.zeros((width, height), dtype=np.intc, order="F")
+        # Navigation grid (tiles + blocking entities) and its reusable A* pathfinder
+        self.nav_map = None
+        self.pathfinder = None
+        # Dijkstra distance map towards `flow_target`, shared by chasing
+        # monsters. It covers a window of the map whose corner is `flow_origin`
+        self.flow_field = None
+        self.flow_origin = None
+        self.flow_target = None
+        # Cells whose contents changed since the last frame was drawn
+        self.dirty = DirtyRegions()
+        # Tracked entities grouped by render order, lowest first. Each bucket
+        # is a dict used as an insertion ordered set
+        self.render_buckets = {
+            order: {} for order in sorted(RenderOrder, key=lambda o: o.value)
+        }
 
-    def initialize_tiles(self) -> list:
-        """Initialize the tile map
+    def initialize_tiles(self) -> TileGrid:
+        """Initialize the tile arrays, with every tile blocked and unexplored
         
         Returns:
-            list -- tile grid
+            TileGrid -- `tiles[x][y]` view over the tile arrays
         """
-        # Initialize the WxH tile grid with non-blocking tiles
-        tiles = [[Tile(True) for y in range(self.height)] for x in range(self.width)]
+        # Fortran order keeps each column contiguous, same as tcod's [x, y] maps
+        shape = (self.width, self.height)
+        self.walkable = np.zeros(shape, dtype=bool, order="F")
+        self.transparent = np.zeros(shape, dtype=bool, order="F")
+        self.explored = np.zeros(shape, dtype=bool, order="F")
 
-        return tiles
+        return TileGrid(self)
 
     def make_map(
         self,
@@ -48,6 +86,7 @@ class GameMap:
         entities: list,
         max_monsters_per_room: int = 5,
         max_items_per_room: int = 3,
+        rng: RandomStreams = None,
     ):
         """Create a map spawning random rooms as much as possible
         
@@ -59,7 +98,11 @@ class GameMap:
             entities {list} -- World entities list
             max_monsters_per_room {int} -- Limit of monsters per room (Default: 5)
             max_items_per_room {int} -- Limit of spawnable items per room (Default: 3)
+            rng {RandomStreams} -- random streams, `mapgen` shapes the rooms and `spawning` fills them (Default: global `random`)
         """
+        if rng is None:
+            rng = RandomStreams()
+        randint = rng.mapgen.randint
         rooms = []
         num_rooms = 0
 
@@ -78,7 +121,7 @@ class GameMap:
                 if new_room.intersect(other_room):
                     break
             else:
-                # No intersections found
+                # No intersections found, carve it out
                 self.create_room(new_room)
                 # Get the center of the room
                 (center_x, center_y) = new_room.center()
@@ -86,6 +129,7 @@ class GameMap:
                     # this is the first room, spawn the player
                     player.x = center_x
                     player.y = center_y
+                    self.add_entity(player)
                 else:
                     # after the first room
                     # connect it to the previous room with a tunnel
@@ -103,22 +147,80 @@ class GameMap:
                         self.create_h_tunnel(prev_x, center_x, center_y)
                 # Spawn entities in this room
                 self.place_entities(
-                    new_room, entities, max_monsters_per_room, max_items_per_room
+                    new_room,
+                    entities,
+                    max_monsters_per_room,
+                    max_items_per_room,
+                    rng=rng.spawning,
                 )
                 # save the created room to a list
                 rooms.append(new_room)
                 num_rooms += 1
 
+        # The layout is final, build the navigation grid for this level
+        self.initialize_navigation()
+
+    def carve(self, region: object):
+        """Open up (make walkable and transparent) a region of the map at once
+        
+        Arguments:
+            region {object} -- any NumPy index into the `[x, y]` tile arrays:
+                a tuple of slices or a boolean mask of the map's shape
+        """
+        self.walkable[region] = True
+        self.transparent[region] = True
+
+    def carve_rect(self, x1: int, y1: int, x2: int, y2: int):
+        """Carve the rectangle spanning [x1, x2) by [y1, y2)
+        
+        Arguments:
+            x1 {int} -- left edge (inclusive)
+            y1 {int} -- top edge (inclusive)
+            x2 {int} -- right edge (exclusive)
+            y2 {int} -- bottom edge (exclusive)
+        """
+        self.carve((slice(x1, x2), slice(y1, y2)))
+
+    def carve_h_line(self, x1: int, x2: int, y: int):
+        """Carve a horizontal line between x1 and x2 (both inclusive)
+        
+        Arguments:
+            x1 {int} -- start of the line
+            x2 {int} -- end of the line
+            y {int} -- y position of the line
+        """
+        self.carve((slice(min(x1, x2), max(x1, x2) + 1), y))
+
+    def carve_v_line(self, y1: int, y2: int, x: int):
+        """Carve a vertical line between y1 and y2 (both inclusive)
+        
+        Arguments:
+            y1 {int} -- start of the line
+            y2 {int} -- end of the line
+            x {int} -- x position of the line
+        """
+        self.carve((x, slice(min(y1, y2), max(y1, y2) + 1)))
+
+    def carve_mask(self, mask: np.ndarray):
+        """Carve every tile where `mask` is True
+        
+        Arguments:
+            mask {np.ndarray} -- boolean array with shape (width, height)
+        """
+        if mask.shape != self.walkable.shape:
+            raise ValueError(
+                f"Mask shape {mask.shape} does not match map shape {self.walkable.shape}."
+            )
+        self.carve(mask)
+
     def create_room(self, room: Room):
         """Carve out a room in the GameMap
         
         Arguments:
             room {Room} -- room object containing dimensions for the room
         """
-        for x in range(room.x1 + 1, room.x2):
-            for y in range(room.y1 + 1, room.y2):
-                self.tiles[x][y].blocked = False
-                self.tiles[x][y].block_sight = False
+        # The room's outer border stays as wall
+        self.carve_rect(room.x1 + 1, room.y1 + 1, room.x2, room.y2)
 
     def create_h_tunnel(self, x1: int, x2: int, y: int):
         """Define a horizontal tunnel
@@ -128,9 +230,7 @@ class GameMap:
             x2 {int} -- end of the tunnel
             y {int} -- y position related to gamemap
         """
-        for x in range(min(x1, x2), max(x1, x2) + 1):
-            self.tiles[x][y].blocked = False
-            self.tiles[x][y].block_sight = False
+        self.carve_h_line(x1, x2, y)
 
     def create_v_tunnel(self, y1: int, y2: int, x: int):
         """Define a vertical tunnel
@@ -140,9 +240,19 @@ class GameMap:
             y2 {int} -- end of the tunnel
             x {int} -- x position related to gamemap
         """
-        for y in range(min(y1, y2), max(y1, y2) + 1):
-            self.tiles[x][y].blocked = False
-            self.tiles[x][y].block_sight = False
+        self.carve_v_line(y1, y2, x)
+
+    def create_entity(self, *args, **kwargs) -> Entity:
+        """Create an entity for this map, using the map's registry if it has one
+
+        Takes the same arguments as `Entity`.
+
+        Returns:
+            Entity -- the new entity
+        """
+        if self.registry is not None:
+            return self.registry.create(*args, **kwargs)
+        return Entity(*args, **kwargs)
 
     def place_entities(
         self,
@@ -150,7 +260,20 @@ class GameMap:
         entities: list,
         max_monsters_per_room: int,
         max_items_per_room: int,
+        rng: random.Random = None,
     ):
+        """Spawn monsters and items at random places in a room
+
+        Arguments:
+            room {Room} -- room to fill
+            entities {list} -- World entities list
+            max_monsters_per_room {int} -- Limit of monsters per room
+            max_items_per_room {int} -- Limit of spawnable items per room
+
+        Keyword Arguments:
+            rng {random.Random} -- random number generator (default: {the `random` module})
+        """
+        randint = (rng or random).randint
         # Get a random number of monsters for the room
         num_monsters = randint(0, max_monsters_per_room)
         num_items = randint(0, max_items_per_room)
@@ -161,14 +284,12 @@ class GameMap:
             y = randint(room.y1 + 1, room.y2 - 1)
 
             # Check if there's already an entity there
-            if not any(
-                [entity for entity in entities if entity.x == x and entity.y == y]
-            ):
+            if not self.entity_index.at(x, y):
                 # 80% of chance to spawn an Orc, else a Troll
                 if randint(0, 100) < 80:
                     fighter_component = Fighter(hp=10, defense=0, power=3)
                     ai_component = BasicMonster()
-                    monster = Entity(
+                    monster = self.create_entity(
                         x,
                         y,
                         "o",
@@ -182,7 +303,7 @@ class GameMap:
                 else:
                     fighter_component = Fighter(hp=16, defense=1, power=4)
                     ai_component = BasicMonster()
-                    monster = Entity(
+                    monster = self.create_entity(
                         x,
                         y,
                         "T",
@@ -195,18 +316,17 @@ class GameMap:
                     )
 
                 entities.append(monster)
+                self.add_entity(monster)
 
         for _ in range(num_items):
             x = randint(room.x1 + 1, room.x2 - 1)
             y = randint(room.y1 + 1, room.y2 - 1)
 
-            if not any(
-                [entity for entity in entities if entity.x == x and entity.y == y]
-            ):
+            if not self.entity_index.at(x, y):
                 item_chance = randint(0, 100)
                 if item_chance < 70:
                     item_component = Item(use_function=heal, amount=4)
-                    item = Entity(
+                    item = self.create_entity(
                         x,
                         y,
                         "!",
@@ -226,7 +346,7 @@ class GameMap:
                         damage=12,
                         radius=3,
                     )
-                    item = Entity(
+                    item = self.create_entity(
                         x,
                         y,
                         "#",
@@ -244,7 +364,7 @@ class GameMap:
                             libtcod.light_cyan,
                         ),
                     )
-                    item = Entity(
+                    item = self.create_entity(
                         x,
                         y,
                         "#",
@@ -257,7 +377,7 @@ class GameMap:
                     item_component = Item(
                         use_function=cast_lighting, damage=20, maximum_range=5
                     )
-                    item = Entity(
+                    item = self.create_entity(
                         x,
                         y,
                         "#",
@@ -268,6 +388,7 @@ class GameMap:
                     )
 
                 entities.append(item)
+                self.add_entity(item)
 
     def is_blocked(self, x: int, y: int) -> bool:
         """Checks if given map position is blocked
@@ -279,4 +400,221 @@ class GameMap:
         Returns:
             bool -- Blocking state of target tile
         """
-        return self.tiles[x][y].blocked
+        return not self.walkable[x, y]
+
+    def radius_mask(self, x: int, y: int, radius: float) -> tuple:
+        """Boolean `[x, y]` mask of the tiles within `radius` of a position.
+
+        Meant for area effects, the mask only covers the circle's bounding
+        box (clipped to the map), so its cost does not depend on the map size.
+        
+        Arguments:
+            x {int} -- x position of the center
+            y {int} -- y position of the center
+            radius {float} -- radius of the area, inclusive
+        
+        Returns:
+            tuple -- (mask, x, y): the mask and the map position of its first cell
+        """
+        r = int(radius)
+        x1, x2 = max(0, x - r), min(self.width, x + r + 1)
+        y1, y2 = max(0, y - r), min(self.height, y + r + 1)
+        if x1 >= x2 or y1 >= y2:
+            return np.zeros((0, 0), dtype=bool), x1, y1
+        xs, ys = np.ogrid[x1:x2, y1:y2]
+        mask = (xs - x) ** 2 + (ys - y) ** 2 <= radius * radius
+        return mask, x1, y1
+
+    def visible_entities(self, visible: np.ndarray, x: int = 0, y: int = 0) -> list:
+        """Tracked entities standing on visible cells, in drawing order
+        (lowest render order first)
+
+        Arguments:
+            visible {np.ndarray} -- boolean `[x, y]` mask of the visible cells
+
+        Keyword Arguments:
+            x {int} -- x position of the mask's first column, for a mask covering only part of the map (default: {0})
+            y {int} -- y position of the mask's first row (default: {0})
+
+        Returns:
+            list -- entities to be drawn
+        """
+        width, height = visible.shape
+        buckets = self.render_buckets.values()
+        if sum(map(len, buckets)) <= np.count_nonzero(visible):
+            # Few entities: walk the buckets, already in render order
+            return [
+                entity
+                for bucket in buckets
+                for entity in bucket
+                if 0 <= entity.x - x < width
+                and 0 <= entity.y - y < height
+                and visible[entity.x - x, entity.y - y]
+            ]
+
+        # Many entities: only look at the visible cells, and order those
+        found = self.entity_index.in_mask(visible, x, y)
+        found.sort(key=lambda entity: entity.render_order.value)
+        return found
+
+    def get_blocking_entity_at(self, x: int, y: int) -> object or None:
+        """Returns the blocking entity at given map position, if any
+        
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+        
+        Returns:
+            object or None -- blocking entity, None if the position is free
+        """
+        if not self.blockers[x, y]:
+            return None
+        return self.entity_index.blocking_at(x, y)
+
+    def initialize_navigation(self):
+        """Build the navigation grid and its A* pathfinder.
+
+        The grid is the walkable tiles minus the tiles occupied by blocking
+        entities. It is kept up to date as entities move, so this only needs
+        to be called again when the map's tiles change.
+        """
+        self.nav_map = libtcod.map.Map(self.width, self.height, order="F")
+        self.nav_map.walkable[...] = self.walkable & (self.blockers == 0)
+        # The 1.41 is the normal diagonal cost of moving, it can be set as 0.0 if diagonal moves are prohibited
+        self.pathfinder = libtcod.path.AStar(self.nav_map, 1.41)
+        # The tiles may have changed, any flow field is now stale
+        self.flow_field = None
+        self.flow_origin = None
+        self.flow_target = None
+
+    def compute_flow_field(self, target_x: int, target_y: int):
+        """Compute a Dijkstra distance map from the tiles around a target towards it.
+
+        Distances are counted in steps (diagonals included) over walkable
+        tiles and ignore entities, so it only has to be recomputed when the
+        target moves or the map changes. Only the tiles within
+        `FLOW_FIELD_RANGE` of the target are searched, which keeps every
+        distance under that range exact while the cost does not grow with
+        the map. Unreachable tiles are left at `FLOW_UNREACHED`.
+        
+        Arguments:
+            target_x {int} -- x position of the target
+            target_y {int} -- y position of the target
+        """
+        x1 = max(0, target_x - FLOW_FIELD_RANGE)
+        y1 = max(0, target_y - FLOW_FIELD_RANGE)
+        x2 = min(self.width, target_x + FLOW_FIELD_RANGE + 1)
+        y2 = min(self.height, target_y + FLOW_FIELD_RANGE + 1)
+        cost = self.walkable[x1:x2, y1:y2].astype(np.int8)
+        distance = libtcod.path.maxarray((x2 - x1, y2 - y1), np.int32, order="F")
+        distance[target_x - x1, target_y - y1] = 0
+        libtcod.path.dijkstra2d(distance, cost, 1, 1)
+
+        self.flow_field = distance
+        self.flow_origin = (x1, y1)
+        self.flow_target = (target_x, target_y)
+
+    def flow_distance(self, x: int, y: int) -> int:
+        """Steps from a tile to the flow field's target
+        
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+        
+        Returns:
+            int -- distance, `FLOW_UNREACHED` if unreachable or outside the field
+        """
+        x -= self.flow_origin[0]
+        y -= self.flow_origin[1]
+        width, height = self.flow_field.shape
+        if 0 <= x < width and 0 <= y < height:
+            return self.flow_field[x, y]
+        return FLOW_UNREACHED
+
+    def refresh_navigation_cell(self, x: int, y: int):
+        """Recompute the navigation grid state of a single tile
+        
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+        """
+        if self.nav_map is not None:
+            self.nav_map.walkable[x, y] = (
+                self.walkable[x, y] and not self.blockers[x, y]
+            )
+
+    def add_entity(self, entity: object):
+        """Start tracking an entity placed in this map
+        
+        Arguments:
+            entity {object} -- Entity placed in the map
+        """
+        entity.game_map = self
+        self.entity_index.add(entity)
+        self.render_buckets[entity.render_order][entity] = None
+        self.dirty.mark_cell(entity.x, entity.y)
+        if entity.blocks:
+            self._add_blocker(entity.x, entity.y)
+
+    def remove_entity(self, entity: object):
+        """Stop tracking an entity that left the map
+        
+        Arguments:
+            entity {object} -- Entity removed from the map
+        """
+        if entity.blocks:
+            self._remove_blocker(entity.x, entity.y)
+        self.entity_index.remove(entity)
+        del self.render_buckets[entity.render_order][entity]
+        self.dirty.mark_cell(entity.x, entity.y)
+        entity.game_map = None
+
+    def move_entity(self, entity: object, x: int, y: int):
+        """Move a tracked entity to a new position
+        
+        Arguments:
+            entity {object} -- Entity to be moved
+            x {int} -- new x position
+            y {int} -- new y position
+        """
+        self.entity_index.move(entity, x, y)
+        self.dirty.mark_cell(entity.x, entity.y)
+        self.dirty.mark_cell(x, y)
+        if entity.blocks:
+            self._remove_blocker(entity.x, entity.y)
+            self._add_blocker(x, y)
+        entity.x = x
+        entity.y = y
+
+    def set_entity_blocks(self, entity: object, blocks: bool):
+        """Change the blocking behaviour of a tracked entity
+        
+        Arguments:
+            entity {object} -- Entity to be updated
+            blocks {bool} -- new blocking behaviour
+        """
+        if blocks and not entity.blocks:
+            self._add_blocker(entity.x, entity.y)
+        elif entity.blocks and not blocks:
+            self._remove_blocker(entity.x, entity.y)
+        entity.blocks = blocks
+
+    def set_render_order(self, entity: object, render_order: RenderOrder):
+        """Change the render order of a tracked entity
+
+        Arguments:
+            entity {object} -- Entity to be updated
+            render_order {RenderOrder} -- new render order
+        """
+        del self.render_buckets[entity.render_order][entity]
+        self.render_buckets[render_order][entity] = None
+        self.dirty.mark_cell(entity.x, entity.y)
+        entity.render_order = render_order
+
+    def _add_blocker(self, x: int, y: int):
+        self.blockers[x, y] += 1
+        self.refresh_navigation_cell(x, y)
+
+    def _remove_blocker(self, x: int, y: int):
+        self.blockers[x, y] -= 1
+        self.refresh_navigation_cell(x, y)
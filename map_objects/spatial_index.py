@@ -0,0 +1,157 @@
+import math
+
+
+class SpatialIndex:
+    """Spatial hash of entities by map cell.
+
+    Lets position lookups touch only the entities standing on a cell instead
+    of scanning every entity in the world.
+    """
+
+    def __init__(self):
+        """SpatialIndex initializer
+        """
+        self.cells = {}  # (x, y) -> list of entities standing there
+
+    def __len__(self) -> int:
+        return sum(len(cell) for cell in self.cells.values())
+
+    def add(self, entity: object):
+        """Index an entity at its current position
+        
+        Arguments:
+            entity {object} -- Entity to be indexed
+        """
+        self.cells.setdefault((entity.x, entity.y), []).append(entity)
+
+    def remove(self, entity: object):
+        """Remove an entity from the index, using its current position
+        
+        Arguments:
+            entity {object} -- Entity to be removed
+        """
+        position = (entity.x, entity.y)
+        cell = self.cells[position]
+        cell.remove(entity)
+        if not cell:
+            del self.cells[position]
+
+    def move(self, entity: object, x: int, y: int):
+        """Re-index an entity that is about to move to a new position.
+
+        Must be called before the entity's own position is updated.
+        
+        Arguments:
+            entity {object} -- Entity being moved
+            x {int} -- new x position
+            y {int} -- new y position
+        """
+        self.remove(entity)
+        self.cells.setdefault((x, y), []).append(entity)
+
+    def at(self, x: int, y: int) -> list:
+        """Entities at the given position
+        
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+        
+        Returns:
+            list -- entities in the cell, empty if there are none
+        """
+        return self.cells.get((x, y), [])
+
+    def blocking_at(self, x: int, y: int) -> object or None:
+        """Blocking entity at the given position
+        
+        Arguments:
+            x {int} -- x position
+            y {int} -- y position
+        
+        Returns:
+            object or None -- blocking entity in the cell, None if there is none
+        """
+        for entity in self.cells.get((x, y), ()):
+            if entity.blocks:
+                return entity
+        return None
+
+    def within_radius(self, x: int, y: int, radius: float) -> list:
+        """Entities within (Euclidean) `radius` of a position
+        
+        Arguments:
+            x {int} -- x position of the center
+            y {int} -- y position of the center
+            radius {float} -- search radius, inclusive
+        
+        Returns:
+            list -- entities inside the radius
+        """
+        r = int(radius)
+        radius_squared = radius * radius
+        found = []
+
+        if (2 * r + 1) ** 2 <= len(self.cells):
+            # Probe only the cells in the bounding box of the circle
+            for cx in range(x - r, x + r + 1):
+                for cy in range(y - r, y + r + 1):
+                    cell = self.cells.get((cx, cy))
+                    if cell and (cx - x) ** 2 + (cy - y) ** 2 <= radius_squared:
+                        found.extend(cell)
+        else:
+            # Fewer occupied cells than cells in the box, check those instead
+            for (cx, cy), cell in self.cells.items():
+                if (cx - x) ** 2 + (cy - y) ** 2 <= radius_squared:
+                    found.extend(cell)
+
+        return found
+
+    def in_mask(self, mask: object, x: int = 0, y: int = 0) -> list:
+        """Entities standing on the cells where a boolean `[x, y]` mask is True
+        
+        Arguments:
+            mask {np.ndarray} -- boolean array covering the map, or part of it
+
+        Keyword Arguments:
+            x {int} -- x position of the mask's first column in the map (default: {0})
+            y {int} -- y position of the mask's first row in the map (default: {0})
+        
+        Returns:
+            list -- entities inside the mask
+        """
+        found = []
+        xs, ys = mask.nonzero()
+        for position in zip((xs + x).tolist(), (ys + y).tolist()):
+            cell = self.cells.get(position)
+            if cell:
+                found.extend(cell)
+        return found
+
+    def nearest(
+        self, x: int, y: int, max_range: int, predicate: callable = None
+    ) -> object or None:
+        """Closest entity to a position, at most `max_range` away
+        
+        Arguments:
+            x {int} -- x position of the origin
+            y {int} -- y position of the origin
+            max_range {int} -- Maximum range for entity detection
+        
+        Keyword Arguments:
+            predicate {callable} -- only entities for which it returns True are considered (default: {None})
+        
+        Returns:
+            object or None -- Closest entity, none if no entity is close enough
+        """
+        target = None
+        closest_distance = max_range + 1
+
+        for entity in self.within_radius(x, y, closest_distance):
+            if predicate is not None and not predicate(entity):
+                continue
+            distance = math.sqrt((entity.x - x) ** 2 + (entity.y - y) ** 2)
+            if distance < closest_distance:
+                target = entity
+                closest_distance = distance
+
+        return target
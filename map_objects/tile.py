@@ -1,22 +1,82 @@
-class Tile:
-    """Generic Tile class. 
-    A tile may or may not be blocked and may or may not block sight
+class TileView:
+    """Compatibility view over a single cell of a GameMap's tile arrays.
+
+    Reads and writes go straight to the underlying NumPy arrays, so code
+    working with single tiles (`tiles[x][y].blocked`) keeps working.
+    """
+
+    __slots__ = ("game_map", "x", "y")
+
+    def __init__(self, game_map: object, x: int, y: int):
+        """TileView initializer
+
+        Arguments:
+            game_map {object} -- GameMap owning the tile arrays
+            x {int} -- x position of the tile
+            y {int} -- y position of the tile
+        """
+        self.game_map = game_map
+        self.x = x
+        self.y = y
+
+    @property
+    def blocked(self) -> bool:
+        return not self.game_map.walkable[self.x, self.y]
+
+    @blocked.setter
+    def blocked(self, value: bool):
+        self.game_map.walkable[self.x, self.y] = not value
+
+    @property
+    def block_sight(self) -> bool:
+        return not self.game_map.transparent[self.x, self.y]
+
+    @block_sight.setter
+    def block_sight(self, value: bool):
+        self.game_map.transparent[self.x, self.y] = not value
+
+    @property
+    def explored(self) -> bool:
+        return bool(self.game_map.explored[self.x, self.y])
+
+    @explored.setter
+    def explored(self, value: bool):
+        self.game_map.explored[self.x, self.y] = value
+
+
+class TileColumn:
+    """A single column (fixed x) of the tile grid, indexed by y
+    """
+
+    __slots__ = ("game_map", "x")
+
+    def __init__(self, game_map: object, x: int):
+        self.game_map = game_map
+        self.x = x
+
+    def __len__(self) -> int:
+        return self.game_map.height
+
+    def __getitem__(self, y: int) -> TileView:
+        return TileView(self.game_map, self.x, y)
+
+
+class TileGrid:
+    """Read/write `tiles[x][y]` view over the array-backed tile storage
     """
 
-    def __init__(self, blocked: bool, block_sight: bool = None):
-        """Tile initializer.
-        
+    __slots__ = ("game_map",)
+
+    def __init__(self, game_map: object):
+        """TileGrid initializer
+
         Arguments:
-            blocked {bool} -- blocking status of tile
-        
-        Keyword Arguments:
-            block_sight {bool} -- value determining sight status (default: {None})
+            game_map {object} -- GameMap owning the tile arrays
         """
-        self.blocked = blocked
+        self.game_map = game_map
 
-        # By default, if a tile is blocked, it also blocks sight
-        if block_sight is None:
-            block_sight = blocked
+    def __len__(self) -> int:
+        return self.game_map.width
 
-        self.block_sight = block_sight  # flag if tile blocks sight of other tiles
-        self.explored = False  # has the player been in this tile yet
+    def __getitem__(self, x: int) -> TileColumn:
+        return TileColumn(self.game_map, x)
@@ -1,5 +1,12 @@
 import tcod as libtcod
 
+MENU_CACHE_SIZE = 16  # menu windows kept for reuse
+
+# (header, options, width) -> (window, height) of menus drawn before
+_menu_cache = {}
+# (width, height) -> (window, (lines, scroll)) of the message history viewer
+_history_windows = {}
+
 
 def menu(
     con: libtcod.console.Console,
@@ -25,6 +32,42 @@ def menu(
     if len(options) > 26:
         raise ValueError("Cannot have a menu with more than 26 options.")
 
+    # The window only changes with its contents, reuse it when possible
+    key = (header, tuple(options), width)
+    cached = _menu_cache.get(key)
+    if cached is None:
+        cached = _draw_menu(con, header, options, width, screen_height)
+        if len(_menu_cache) >= MENU_CACHE_SIZE:
+            # Forget the oldest window
+            del _menu_cache[next(iter(_menu_cache))]
+        _menu_cache[key] = cached
+    window, height = cached
+
+    # blit the contents of "window" to the root console
+    x = int(screen_width / 2 - width / 2)
+    y = int(screen_height / 2 - height / 2)
+    libtcod.console_blit(window, 0, 0, width, height, 0, x, y, 1.0, 0.7)
+
+
+def _draw_menu(
+    con: libtcod.console.Console,
+    header: str,
+    options: list,
+    width: int,
+    screen_height: int,
+) -> tuple:
+    """Draw a menu in a new off screen console
+
+    Arguments:
+        con {libtcod.console.Console} -- Target console to show the menu
+        header {str} -- header (description) for the menu
+        options {list} -- lsit of options for the menu
+        width {int} -- desired width of the menu
+        screen_height {int} -- limit screen height
+
+    Returns:
+        tuple -- the console and its height
+    """
     # calculate total height for the header (after auto-wrap), one line per option
     header_height = libtcod.console_get_height_rect(
         con, 0, 0, width, screen_height, header
@@ -49,10 +92,7 @@ def menu(
         y += 1
         letter_index += 1
 
-    # blit the contents of "window" to the root console
-    x = int(screen_width / 2 - width / 2)
-    y = int(screen_height / 2 - height / 2)
-    libtcod.console_blit(window, 0, 0, width, height, 0, x, y, 1.0, 0.7)
+    return window, height
 
 
 def inventory_menu(
@@ -70,3 +110,65 @@ def inventory_menu(
         options = [item.name for item in inventory.items]
 
     menu(con, header, options, inventory_width, screen_width, screen_height)
+
+
+def message_history_menu(
+    con: libtcod.console.Console,
+    history: object,
+    scroll: int,
+    page_size: int,
+    screen_width: int,
+    screen_height: int,
+):
+    """Show one page of the message history, over the screen.
+
+    Arguments:
+        con {libtcod.console.Console} -- Target console to show the menu
+        history {MessageHistory} -- full message history
+        scroll {int} -- lines scrolled back from the newest message
+        page_size {int} -- lines shown at once
+        screen_width {int} -- limit screen width
+        screen_height {int} -- limit screen height
+    """
+    width = history.width
+    header = "Message history. Up/Down, PgUp/PgDn to scroll, ESC to close.\n"
+    header_height = libtcod.console_get_height_rect(
+        con, 0, 0, width, screen_height, header
+    )
+    height = page_size + header_height
+
+    # One off screen console is kept for the history's window, only drawn
+    # again when the page it shows changed
+    lines = len(history)
+    cached = _history_windows.get((width, height))
+    if cached is not None and cached[1] == (lines, scroll):
+        window = cached[0]
+    else:
+        if cached is None:
+            window = libtcod.console_new(width, height)
+        else:
+            window = cached[0]
+            libtcod.console_clear(window)
+        _history_windows[(width, height)] = (window, (lines, scroll))
+
+        # Render the header
+        libtcod.console_set_default_foreground(window, libtcod.white)
+        libtcod.console_print_rect_ex(
+            window, 0, 0, width, height, libtcod.BKGND_NONE, libtcod.LEFT, header
+        )
+
+        # Render the page ending `scroll` lines before the newest one
+        end = lines - scroll
+        start = max(0, end - page_size)
+        y = header_height
+        for text, color in history.lines(start, end - start):
+            libtcod.console_set_default_foreground(window, color)
+            libtcod.console_print_ex(
+                window, 0, y, libtcod.BKGND_NONE, libtcod.LEFT, text
+            )
+            y += 1
+
+    # blit the contents of "window" to the root console
+    x = int(screen_width / 2 - width / 2)
+    y = int(screen_height / 2 - height / 2)
+    libtcod.console_blit(window, 0, 0, width, height, 0, x, y, 1.0, 0.7)
@@ -0,0 +1,130 @@
+import mmap
+
+COLOR_SIZE = 3  # one byte per RGB channel
+
+
+class MessageHistory:
+    """Append-only on-disk log of every message line.
+
+    Each wrapped line is stored as a fixed-size record: the UTF-8 text
+    padded with NUL bytes to `width` bytes, followed by its RGB color. The
+    file is memory-mapped for reading, so any page of the history can be
+    read without loading the rest. Messages are buffered and written in
+    batches, keeping the memory used by the history bounded.
+    """
+
+    __slots__ = (
+        "path",
+        "width",
+        "record_size",
+        "flush_every",
+        "pending",
+        "count",
+        "file",
+        "reader",
+        "view",
+    )
+
+    def __init__(self, path: str, width: int, flush_every: int = 64):
+        """MessageHistory initializer. Starts a new, empty history file
+
+        Arguments:
+            path {str} -- file holding the history
+            width {int} -- maximum line length, as in the message log
+
+        Keyword Arguments:
+            flush_every {int} -- number of buffered messages written at once (default: {64})
+        """
+        self.path = path
+        self.width = width
+        self.record_size = width + COLOR_SIZE
+        self.flush_every = flush_every
+        self.pending = []  # messages not written yet
+        self.count = 0  # lines written to the file
+        self.file = open(path, "wb")
+        self.reader = None  # read handle and mapping, opened on first read
+        self.view = None
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.count
+
+    def append(self, message: object):
+        """Add a message at the end of the history
+
+        Arguments:
+            message {Message} -- message to be stored
+        """
+        self.pending.append(message)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered messages to the file, one record per line
+        """
+        if not self.pending:
+            return
+
+        width = self.width
+        records = []
+        for message in self.pending:
+            color = bytes(message.color[:COLOR_SIZE])
+            for line in message.wrap(width):
+                text = line.encode("utf-8")[:width]
+                records.append(text.ljust(width, b"\0") + color)
+        self.pending.clear()
+
+        self.file.write(b"".join(records))
+        self.file.flush()
+        self.count += len(records)
+
+    def lines(self, start: int, count: int) -> list:
+        """Read a range of lines from the history
+
+        Arguments:
+            start {int} -- index of the first line, 0 being the oldest
+            count {int} -- maximum number of lines to read
+
+        Returns:
+            list -- (text, color) tuples
+        """
+        end = min(start + count, len(self))
+        start = max(start, 0)
+        if start >= end:
+            return []
+
+        view = self._map()
+        size = self.record_size
+        width = self.width
+        result = []
+        for offset in range(start * size, end * size, size):
+            record = view[offset : offset + size]
+            text = record[:width].rstrip(b"\0").decode("utf-8", errors="ignore")
+            result.append((text, tuple(record[width:])))
+        return result
+
+    def close(self):
+        """Write pending messages and release the file
+        """
+        self.flush()
+        self.file.close()
+        if self.view is not None:
+            self.view.close()
+            self.reader.close()
+            self.view = self.reader = None
+
+    def _map(self) -> mmap.mmap:
+        """Memory map covering every line written so far
+
+        Returns:
+            mmap.mmap -- read-only view of the file
+        """
+        length = self.count * self.record_size
+        if self.view is None or len(self.view) < length:
+            # The file grew since it was mapped
+            if self.view is not None:
+                self.view.close()
+            else:
+                self.reader = open(self.path, "rb")
+            self.view = mmap.mmap(self.reader.fileno(), length, access=mmap.ACCESS_READ)
+        return self.view
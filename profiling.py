@@ -0,0 +1,231 @@
+"""Per-phase timers for the game loop.
+
+Phases are timed with the global `profiler`:
+
+    start = profiler.start()
+    ...
+    profiler.stop("fov", start)
+
+or by decorating a function with `timed("name")`. While the profiler is
+disabled (the default) both return right away.
+
+The last durations of each phase give rolling percentiles for the in-game
+overlay, and a range of turns can be captured as a Chrome trace (open it
+in chrome://tracing or Perfetto) or as cProfile statistics.
+"""
+import cProfile
+import functools
+import json
+import time
+from collections import deque
+
+perf_counter = time.perf_counter
+
+
+class Profiler:
+    """Rolling timings of each phase, and captures over ranges of turns
+    """
+
+    __slots__ = (
+        "enabled",
+        "window",
+        "samples",
+        "turn",
+        "origin",
+        "capture_turns",
+        "capture_path",
+        "capturing",
+        "was_enabled",
+        "trace_events",
+        "cprofile",
+    )
+
+    def __init__(self, window: int = 240):
+        """Profiler initializer
+
+        Keyword Arguments:
+            window {int} -- durations kept per phase for the percentiles (default: {240})
+        """
+        self.enabled = False
+        self.window = window
+        self.samples = {}  # phase -> deque of the last durations, in seconds
+        self.turn = 0  # player turns played so far
+        self.origin = perf_counter()  # time 0 of the traces
+        # Capture of a range of turns, see `capture`
+        self.capture_turns = None
+        self.capture_path = None
+        self.capturing = False
+        self.was_enabled = False
+        self.trace_events = None
+        self.cprofile = None
+
+    def start(self) -> float:
+        """Start timing a phase
+
+        Returns:
+            float -- start time to give to `stop`, 0 when disabled
+        """
+        if not self.enabled:
+            return 0.0
+        return perf_counter()
+
+    def stop(self, phase: str, start: float):
+        """Record the duration of a phase
+
+        Arguments:
+            phase {str} -- name of the phase
+            start {float} -- value returned by `start`
+        """
+        if not (self.enabled and start):
+            return
+        end = perf_counter()
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.window)
+        samples.append(end - start)
+        if self.trace_events is not None:
+            self.trace_events.append(
+                {
+                    "name": phase,
+                    "ph": "X",
+                    "ts": (start - self.origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                }
+            )
+
+    def stats(self) -> list:
+        """Rolling percentiles of every phase, in the order phases were first seen
+
+        Returns:
+            list -- (phase, p50, p99) tuples, times in milliseconds
+        """
+        stats = []
+        for phase, samples in self.samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            p50 = ordered[(count - 1) // 2]
+            p99 = ordered[min(count - 1, int(count * 0.99))]
+            stats.append((phase, p50 * 1000, p99 * 1000))
+        return stats
+
+    def end_turn(self):
+        """Count a player turn, starting or finishing a pending capture
+        """
+        self.turn += 1
+        if self.trace_events is not None:
+            self.trace_events.append(
+                {
+                    "name": f"turn {self.turn}",
+                    "ph": "i",
+                    "s": "g",
+                    "ts": (perf_counter() - self.origin) * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                }
+            )
+        if self.capture_turns is not None:
+            self._update_capture()
+
+    def capture(self, first_turn: int, last_turn: int or None, path: str):
+        """Capture a range of turns to a file.
+
+        Paths ending in `.prof` get cProfile statistics (read them with
+        `pstats`), any other path a Chrome trace of the timed phases.
+
+        Arguments:
+            first_turn {int} -- turn the capture starts at
+            last_turn {int or None} -- last turn captured, None to capture until `finish_capture`
+            path {str} -- file written when the capture is over
+        """
+        if self.capturing:
+            self.finish_capture()
+        self.capture_turns = (first_turn, last_turn)
+        self.capture_path = path
+        self._update_capture()
+
+    def toggle_capture(self, path: str) -> str or None:
+        """Start capturing from the current turn, or finish the running capture
+
+        Arguments:
+            path {str} -- file written when the capture is over
+
+        Returns:
+            str or None -- path of the file written, None if a capture started
+        """
+        if self.capturing:
+            return self.finish_capture()
+        self.capture(self.turn, None, path)
+        return None
+
+    def finish_capture(self) -> str or None:
+        """Stop the running capture and write it out
+
+        Returns:
+            str or None -- path of the file written, None if nothing was captured
+        """
+        self.capture_turns = None
+        if not self.capturing:
+            return None
+        self.capturing = False
+        self.enabled = self.was_enabled
+        path = self.capture_path
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(path)
+            self.cprofile = None
+        else:
+            with open(path, "w") as trace_file:
+                json.dump(
+                    {"traceEvents": self.trace_events, "displayTimeUnit": "ms"},
+                    trace_file,
+                )
+            self.trace_events = None
+        return path
+
+    def _update_capture(self):
+        first_turn, last_turn = self.capture_turns
+        if self.turn < first_turn:
+            return
+        if last_turn is not None and self.turn > last_turn:
+            self.finish_capture()
+        elif not self.capturing:
+            self.capturing = True
+            # Traces are made of the timed phases
+            self.was_enabled = self.enabled
+            self.enabled = True
+            if self.capture_path.endswith(".prof"):
+                self.cprofile = cProfile.Profile()
+                self.cprofile.enable()
+            else:
+                self.trace_events = []
+
+
+profiler = Profiler()
+
+
+def timed(phase: str) -> object:
+    """Decorator timing every call of a function as a phase
+
+    Arguments:
+        phase {str} -- name of the phase
+
+    Returns:
+        callable -- decorator
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.stop(phase, start)
+
+        return wrapper
+
+    return decorator
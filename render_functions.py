@@ -1,9 +1,11 @@
 from enum import Enum, auto
 
+import numpy as np
 import tcod as libtcod
 
 from game_states import GameStates
-from menus import inventory_menu
+from menus import inventory_menu, message_history_menu
+from profiling import timed
 
 
 class RenderOrder(Enum):
@@ -12,25 +14,28 @@ class RenderOrder(Enum):
     ACTOR = 3
 
 
-def get_names_under_mouse(mouse: object, entities: list, fov_map: object) -> list:
+def get_names_under_mouse(
+    mouse: object, game_map: object, fov_map: object, camera: object
+) -> list:
     """Utility function to get names of entities under mouse cursor
     
     Arguments:
         mouse {object} -- mouse pointer object
-        entities {list} -- lsit of entities in the map
+        game_map {object} -- GameMap object, holding the entities' positions
         fov_map {object} -- FoV map
+        camera {Camera} -- view over the map, to find the cell under the mouse
     
     Returns:
         list -- List of entities names
     """
-    (x, y) = (mouse.cx, mouse.cy)
+    (x, y) = camera.to_world(mouse.cx, mouse.cy)
+    if not camera.contains(x, y):
+        return ""
 
     names = [
         entity.name
-        for entity in entities
-        if entity.x == x
-        and entity.y == y
-        and libtcod.map_is_in_fov(fov_map, entity.x, entity.y)
+        for entity in game_map.entity_index.at(x, y)
+        if libtcod.map_is_in_fov(fov_map, entity.x, entity.y)
     ]
     names = ", ".join(names)
 
@@ -82,87 +87,84 @@ def render_bar(
     )
 
 
-def render_all(
+def render_map(
     con: libtcod.console.Console,
-    panel: libtcod.console.Console,
-    entities: list,
-    player: object,
     game_map: object,
     fov_map: libtcod.map.Map,
-    fov_recompute: bool,
+    colors: dict,
+    camera: object,
+):
+    """Draw the map tiles' background and mark visible tiles as explored.
+
+    The part of the map inside the camera's view is drawn with array
+    operations: the FoV, wall and explored masks select a color for each
+    tile, which are then written to the console's background in one
+    assignment.
+    
+    Arguments:
+        con {libtcod.console.Console} -- target console
+        game_map {object} -- GameMap object
+        fov_map {libtcod.map.Map} -- FoV map (what we see), in [x, y] order
+        colors {dict} -- colors to be used for the map
+        camera {Camera} -- view over the map
+    """
+    view = camera.view()
+    visible = fov_map.fov[view]
+    # The view is centered on the player, so it holds the whole FoV as long
+    # as the FoV radius is under half the view size
+    explored = game_map.explored[view]
+    explored |= visible
+
+    # Color of each tile, indexed by visible * 2 + wall
+    palette = np.array(
+        [
+            colors.get("dark_ground"),
+            colors.get("dark_wall"),
+            colors.get("light_ground"),
+            colors.get("light_wall"),
+        ],
+        dtype=np.uint8,
+    )
+    tile_colors = visible * 2 + ~game_map.transparent[view]
+
+    # The console is indexed [y, x], view it as [x, y] like the map
+    bg = con.bg[: camera.height, : camera.width].transpose(1, 0, 2)
+    # Tiles never seen are left black
+    bg[~explored] = 0
+    bg[explored] = palette[tile_colors[explored]]
+
+
+def render_panel(
+    panel: libtcod.console.Console,
+    player: object,
     message_log: object,
+    names_under_mouse: str,
     screen_width: int,
-    screen_height: int,
     bar_width: int,
     panel_height: int,
     panel_y: int,
-    mouse: object,
-    colors: dict,
-    gs: GameStates,
 ):
-    """Wrapper funtion to make libtcod calls rendering all entities
+    """Draw the UI panel (messages, HP bar and names under the mouse)
     
     Arguments:
-        con {libtcod.console.Console} -- target console
         panel {libtcod.console.Console} -- UI panel
-        entities {list} -- list of entities to be drawn
         player {object} -- player object
-        game_map {object} -- GameMap object
-        fov_map {libtcod.map.Map} -- FoV map (what we see)
-        fov_recompute {bool} -- flag controlling FoV calculation
         message_log {MessageLog} -- Game message log
+        names_under_mouse {str} -- names of the entities under the mouse cursor
         screen_width {int} -- screen width
-        screen_height {int} -- screen height
         bar_width {int} -- Desired bar width
         panel_height {int} -- UI panel height
         panel_y {int} -- y position for the UI panel
-        mouse {object} -- Mouse cursor object
-        colors {dict} -- colors to be used for the map
-        gs {GameStates} -- Current Game State
     """
-    if fov_recompute:
-        # Draw all map tiles
-        for y in range(game_map.height):
-            for x in range(game_map.width):
-                visible = libtcod.map_is_in_fov(fov_map, x, y)
-                wall = game_map.tiles[x][y].block_sight
-                if visible:
-                    if wall:
-                        libtcod.console_set_char_background(
-                            con, x, y, colors.get("light_wall"), libtcod.BKGND_SET
-                        )
-                    else:
-                        libtcod.console_set_char_background(
-                            con, x, y, colors.get("light_ground"), libtcod.BKGND_SET
-                        )
-                    game_map.tiles[x][y].explored = True
-                # Else, checks if we have explored it yet
-                elif game_map.tiles[x][y].explored:
-                    if wall:
-                        libtcod.console_set_char_background(
-                            con, x, y, colors.get("dark_wall"), libtcod.BKGND_SET
-                        )
-                    else:
-                        libtcod.console_set_char_background(
-                            con, x, y, colors.get("dark_ground"), libtcod.BKGND_SET
-                        )
-
-    # Draw all entities in the list from lowest to highest priority
-    entities_in_render_order = sorted(entities, key=lambda x: x.render_order.value)
-    for entity in entities_in_render_order:
-        draw_entity(con, entity, fov_map)
-
-    libtcod.console_blit(con, 0, 0, screen_width, screen_height, 0, 0, 0)
-
     libtcod.console_set_default_background(panel, libtcod.black)
     libtcod.console_clear(panel)
 
     # Print the game messages, one line at a time
     y = 1
-    for message in message_log.messages:
-        libtcod.console_set_default_foreground(panel, message.color)
+    for text, color in message_log.visible_lines():
+        libtcod.console_set_default_foreground(panel, color)
         libtcod.console_print_ex(
-            panel, message_log.x, y, libtcod.BKGND_NONE, libtcod.LEFT, message.text
+            panel, message_log.x, y, libtcod.BKGND_NONE, libtcod.LEFT, text
         )
         y += 1
 
@@ -180,17 +182,137 @@ def render_all(
 
     libtcod.console_set_default_foreground(panel, libtcod.light_gray)
     libtcod.console_print_ex(
-        panel,
-        1,
-        0,
-        libtcod.BKGND_NONE,
-        libtcod.LEFT,
-        get_names_under_mouse(mouse, entities, fov_map),
+        panel, 1, 0, libtcod.BKGND_NONE, libtcod.LEFT, names_under_mouse
     )
 
     libtcod.console_blit(panel, 0, 0, screen_width, panel_height, 0, 0, panel_y)
 
-    if gs in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY):
+
+@timed("render_all")
+def render_all(
+    con: libtcod.console.Console,
+    panel: libtcod.console.Console,
+    entities: list,
+    player: object,
+    game_map: object,
+    camera: object,
+    fov_map: libtcod.map.Map,
+    fov_recompute: bool,
+    message_log: object,
+    screen_width: int,
+    screen_height: int,
+    bar_width: int,
+    panel_height: int,
+    panel_y: int,
+    mouse: object,
+    colors: dict,
+    gs: GameStates,
+    history_scroll: int = 0,
+    history_page_size: int = 40,
+):
+    """Wrapper funtion to make libtcod calls rendering all entities
+    
+    Arguments:
+        con {libtcod.console.Console} -- target console
+        panel {libtcod.console.Console} -- UI panel
+        entities {list} -- list of entities in the map (drawn from `game_map`)
+        player {object} -- player object
+        game_map {object} -- GameMap object
+        camera {Camera} -- view over the map, following the player
+        fov_map {libtcod.map.Map} -- FoV map (what we see)
+        fov_recompute {bool} -- flag controlling FoV calculation
+        message_log {MessageLog} -- Game message log
+        screen_width {int} -- screen width
+        screen_height {int} -- screen height
+        bar_width {int} -- Desired bar width
+        panel_height {int} -- UI panel height
+        panel_y {int} -- y position for the UI panel
+        mouse {object} -- Mouse cursor object
+        colors {dict} -- colors to be used for the map
+        gs {GameStates} -- Current Game State
+
+    Keyword Arguments:
+        history_scroll {int} -- lines the message history viewer is scrolled back (default: {0})
+        history_page_size {int} -- lines per page of the message history viewer (default: {40})
+    """
+    dirty = game_map.dirty
+    # A new FoV or a moved camera changes the whole map, and a new game
+    # state may have left a menu drawn over the screen
+    camera_moved = camera.follow(player.x, player.y)
+    if fov_recompute or camera_moved or gs != dirty.game_state:
+        dirty.mark_all()
+        dirty.game_state = gs
+    # Menus are blended over the screen, which must be fully blitted under them
+    menu_open = gs in (
+        GameStates.SHOW_INVENTORY,
+        GameStates.DROP_INVENTORY,
+        GameStates.MESSAGE_HISTORY,
+    )
+
+    if dirty.full_redraw:
+        if fov_recompute or camera_moved:
+            render_map(con, game_map, fov_map, colors, camera)
+
+        # Erase every entity drawn before, then draw the visible entities
+        # from lowest to highest priority
+        con.ch[: camera.height, : camera.width] = ord(" ")
+        for entity in game_map.visible_entities(
+            fov_map.fov[camera.view()], camera.x, camera.y
+        ):
+            draw_entity(con, entity, fov_map, camera)
+    else:
+        # Only redraw the on screen cells where something changed
+        for x, y in dirty.cells:
+            if not camera.contains(x, y):
+                continue
+            screen_x, screen_y = camera.to_screen(x, y)
+            libtcod.console_put_char(con, screen_x, screen_y, " ", libtcod.BKGND_NONE)
+            for entity in sorted(
+                game_map.entity_index.at(x, y), key=lambda e: e.render_order.value
+            ):
+                draw_entity(con, entity, fov_map, camera)
+
+    if dirty.full_redraw or menu_open:
+        libtcod.console_blit(con, 0, 0, screen_width, screen_height, 0, 0, 0)
+    elif dirty.cells:
+        rect = camera.screen_rect(*dirty.bounds())
+        if rect is not None:
+            x, y, width, height = rect
+            libtcod.console_blit(con, x, y, width, height, 0, x, y)
+
+    # The panel is only rebuilt when what it shows changed
+    names_under_mouse = get_names_under_mouse(mouse, game_map, fov_map, camera)
+    panel_key = (
+        player.fighter.hp,
+        player.fighter.max_hp,
+        names_under_mouse,
+        message_log.version,
+    )
+    if dirty.full_redraw or menu_open or panel_key != dirty.panel_key:
+        dirty.panel_key = panel_key
+        render_panel(
+            panel,
+            player,
+            message_log,
+            names_under_mouse,
+            screen_width,
+            bar_width,
+            panel_height,
+            panel_y,
+        )
+
+    dirty.clear()
+
+    if gs == GameStates.MESSAGE_HISTORY:
+        message_history_menu(
+            con,
+            message_log.history,
+            history_scroll,
+            history_page_size,
+            screen_width,
+            screen_height,
+        )
+    elif menu_open:
         inventory_menu(
             con,
             f"Press the key next to an item to {'use' if gs == GameStates.SHOW_INVENTORY else 'drop'} it, or ESC to cancel.\n",
@@ -201,28 +323,52 @@ def render_all(
         )
 
 
-def clear_all(con: libtcod.console.Console, entities: list):
-    for entity in entities:
-        clear_entity(con, entity)
-
-
-def draw_entity(con: libtcod.console.Console, entity: object, fov_map: libtcod.map.Map):
+def draw_entity(
+    con: libtcod.console.Console,
+    entity: object,
+    fov_map: libtcod.map.Map,
+    camera: object,
+):
     """Render given entity in the map
     
     Arguments:
         con {libtcod.console.Console} -- Target console
         entity {object} -- target entity to rendering
         fov_map {libtcod.map.Map} -- FoV map to determine visibility
+        camera {Camera} -- view over the map
     """
-    # Checks if given entity is visible for player
-    if libtcod.map_is_in_fov(fov_map, entity.x, entity.y):
+    # Checks if given entity is visible for player, and on screen
+    if libtcod.map_is_in_fov(fov_map, entity.x, entity.y) and camera.contains(
+        entity.x, entity.y
+    ):
+        x, y = camera.to_screen(entity.x, entity.y)
         libtcod.console_set_default_foreground(con, entity.color)
-        libtcod.console_put_char(
-            con, entity.x, entity.y, entity.char, libtcod.BKGND_NONE
-        )
+        libtcod.console_put_char(con, x, y, entity.char, libtcod.BKGND_NONE)
 
 
-def clear_entity(con: libtcod.console.Console, entity: object):
-    # erase the character that represents this object
-    libtcod.console_put_char(con, entity.x, entity.y, " ", libtcod.BKGND_NONE)
+def render_profiler(profiler: object, screen_width: int):
+    """Draw the rolling timings of each phase in the top right corner of the
+    root console
 
+    Arguments:
+        profiler {Profiler} -- profiler holding the timings
+        screen_width {int} -- screen width
+    """
+    lines = [f"{'phase':<14}{'p50 ms':>8}{'p99 ms':>8}"]
+    for phase, p50, p99 in profiler.stats():
+        lines.append(f"{phase:<14}{p50:>8.2f}{p99:>8.2f}")
+    if profiler.capturing:
+        lines.append(f"capturing turn {profiler.turn}")
+    width = max(len(line) for line in lines)
+
+    libtcod.console_set_default_background(0, libtcod.black)
+    libtcod.console_set_default_foreground(0, libtcod.light_gray)
+    for y, line in enumerate(lines):
+        libtcod.console_print_ex(
+            0,
+            screen_width - width,
+            y,
+            libtcod.BKGND_SET,
+            libtcod.LEFT,
+            line.ljust(width),
+        )
@@ -0,0 +1,319 @@
+"""Record the actions of a game, and replay them headlessly.
+
+A replay file starts with a header (magic, format version, seed and the
+game configuration as JSON), followed by one record per step: a key
+action and a mouse action, each an opcode byte and its packed arguments.
+
+    python replay.py last_game.replay --render-every 10 --dump
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+MAGIC = b"RLRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHqI")  # magic, version, seed, config length
+
+# Action key -> (opcode, struct format of its arguments)
+KEY_ACTIONS = {
+    "move": (1, "bb"),
+    "pickup": (2, ""),
+    "show_inventory": (3, ""),
+    "drop_inventory": (4, ""),
+    "inventory_index": (5, "H"),
+    "exit": (6, ""),
+    "show_history": (7, ""),
+    "scroll_history": (8, "h"),
+    "scroll_history_page": (9, "h"),
+}
+MOUSE_ACTIONS = {"left_click": (1, "hh"), "right_click": (2, "hh")}
+
+
+def _codec(actions: dict) -> tuple:
+    """Encoding and decoding tables for a set of actions
+
+    Arguments:
+        actions {dict} -- action key -> (opcode, argument format)
+
+    Returns:
+        tuple -- (key -> (opcode, Struct), opcode -> (key, Struct))
+    """
+    encode, decode = {}, {}
+    for key, (opcode, arguments) in actions.items():
+        packer = struct.Struct("<" + arguments)
+        encode[key] = (opcode, packer)
+        decode[opcode] = (key, packer)
+    return encode, decode
+
+
+_KEY_ENCODE, _KEY_DECODE = _codec(KEY_ACTIONS)
+_MOUSE_ENCODE, _MOUSE_DECODE = _codec(MOUSE_ACTIONS)
+
+
+def _encode_action(action: dict, codes: dict) -> bytes:
+    # Only the first action the game knows about is kept, others (such as
+    # toggling fullscreen) do not change the game
+    for key, value in action.items():
+        if key in codes and value is not None and value is not False:
+            opcode, packer = codes[key]
+            if packer.size == 0:
+                arguments = ()
+            elif isinstance(value, tuple):
+                arguments = value
+            else:
+                arguments = (value,)
+            return bytes((opcode,)) + packer.pack(*arguments)
+    return b"\0"
+
+
+def _decode_action(data: bytes, offset: int, codes: dict) -> tuple:
+    opcode = data[offset]
+    offset += 1
+    if opcode == 0:
+        return {}, offset
+    key, packer = codes[opcode]
+    arguments = packer.unpack_from(data, offset)
+    offset += packer.size
+    if packer.size == 0:
+        value = True
+    elif len(arguments) == 1:
+        value = arguments[0]
+    else:
+        value = arguments
+    return {key: value}, offset
+
+
+class ActionRecorder:
+    """Writes every action given to a game to a replay file
+    """
+
+    __slots__ = ("file", "steps")
+
+    def __init__(self, path: str, seed: int, config: dict):
+        """ActionRecorder initializer. Writes the replay header
+
+        Arguments:
+            path {str} -- replay file to be created
+            seed {int} -- seed of the recorded game
+            config {dict} -- JSON serializable game configuration
+        """
+        encoded_config = json.dumps(config).encode("utf-8")
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, len(encoded_config)))
+        self.file.write(encoded_config)
+        self.steps = 0
+
+    def record(self, action: dict, mouse_action: dict = None):
+        """Append one step to the replay.
+
+        Written straight to disk, so a crash keeps the steps leading to it.
+
+        Arguments:
+            action {dict} -- keyboard action, as given to `GameSession.step`
+
+        Keyword Arguments:
+            mouse_action {dict} -- mouse action, in map positions (default: {None})
+        """
+        record = _encode_action(action, _KEY_ENCODE) + _encode_action(
+            mouse_action or {}, _MOUSE_ENCODE
+        )
+        if record == b"\0\0":
+            # Nothing the game would react to
+            return
+        self.file.write(record)
+        self.file.flush()
+        self.steps += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_replay(path: str) -> tuple:
+    """Read a replay file
+
+    Arguments:
+        path {str} -- replay file
+
+    Raises:
+        ValueError: if the file is not a replay, or of an unknown version
+
+    Returns:
+        tuple -- (seed, config, list of (action, mouse_action) steps)
+    """
+    with open(path, "rb") as replay_file:
+        data = replay_file.read()
+
+    magic, version, seed, config_length = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a replay file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported replay version {version}")
+    offset = HEADER.size
+    config = json.loads(data[offset : offset + config_length].decode("utf-8"))
+    offset += config_length
+
+    steps = []
+    while offset < len(data):
+        action, offset = _decode_action(data, offset, _KEY_DECODE)
+        mouse_action, offset = _decode_action(data, offset, _MOUSE_DECODE)
+        steps.append((action, mouse_action))
+    return seed, config, steps
+
+
+def replay(path: str, render_every: int = 0, render_final: bool = False) -> dict:
+    """Re-run a recorded game at full speed
+
+    Arguments:
+        path {str} -- replay file
+
+    Keyword Arguments:
+        render_every {int} -- render one frame every this many steps, 0 to never render (default: {0})
+        render_final {bool} -- render the state reached at the end (default: {False})
+
+    Returns:
+        dict -- summary of the run, with the final screen as text if rendered
+    """
+    # Imported here so reading replays does not need the game
+    from game_session import GameSession
+
+    seed, config, steps = read_replay(path)
+    with tempfile.TemporaryDirectory() as directory:
+        # The history changes which actions are possible, it is kept aside
+        # instead of overwriting the one of the recorded game
+        history_path = None
+        if config["history"]:
+            history_path = os.path.join(directory, "message_history.log")
+        session = GameSession(seed=seed, history_path=history_path, **config["session"])
+        renderer = None
+        if render_every or render_final:
+            renderer = _OffscreenRenderer(session, config)
+
+        start = time.perf_counter()
+        frames = 0
+        for index, (action, mouse_action) in enumerate(steps, 1):
+            session.step(action, mouse_action)
+            if session.exit_requested:
+                break
+            if render_every and index % render_every == 0:
+                renderer.render()
+                frames += 1
+        if render_final:
+            renderer.render()
+            frames += 1
+        elapsed = time.perf_counter() - start
+        session.close()
+
+    player = session.player
+    summary = {
+        "seed": seed,
+        "steps": len(steps),
+        "frames": frames,
+        "seconds": elapsed,
+        "steps_per_second": len(steps) / elapsed if elapsed else None,
+        "game_state": session.game_state.name,
+        "player": [player.x, player.y],
+        "hp": player.fighter.hp,
+    }
+    if renderer is not None:
+        summary["screen"] = renderer.screen_text()
+    return summary
+
+
+class _OffscreenRenderer:
+    """Renders a session the way the engine does, without showing a window
+    """
+
+    def __init__(self, session: object, config: dict):
+        import tcod as libtcod
+
+        from camera import Camera
+        from render_functions import render_all
+
+        screen = config["screen"]
+        self.libtcod = libtcod
+        self.render_all = render_all
+        self.session = session
+        self.width = screen["width"]
+        self.height = screen["height"]
+        self.bar_width = screen["bar_width"]
+        self.panel_height = screen["panel_height"]
+        self.panel_y = self.height - self.panel_height
+        self.colors = {
+            name: libtcod.Color(*rgb) for name, rgb in config["colors"].items()
+        }
+        libtcod.console_set_custom_font(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "arial10x10.png"),
+            libtcod.FONT_TYPE_GREYSCALE | libtcod.FONT_LAYOUT_TCOD,
+        )
+        self.root = libtcod.console_init_root(self.width, self.height, "Replay", False)
+        self.console = libtcod.console.Console(self.width, self.height)
+        self.panel = libtcod.console.Console(self.width, self.panel_height)
+        game_map = session.game_map
+        self.camera = Camera(self.width, self.panel_y, game_map.width, game_map.height)
+        self.mouse = libtcod.Mouse()
+
+    def render(self):
+        session = self.session
+        session.update_fov()
+        # Frames in between were skipped, the map must be drawn again
+        self.render_all(
+            con=self.console,
+            panel=self.panel,
+            entities=session.entities,
+            player=session.player,
+            game_map=session.game_map,
+            camera=self.camera,
+            fov_map=session.fov_map,
+            fov_recompute=True,
+            message_log=session.message_log,
+            screen_width=self.width,
+            screen_height=self.height,
+            bar_width=self.bar_width,
+            panel_height=self.panel_height,
+            panel_y=self.panel_y,
+            mouse=self.mouse,
+            colors=self.colors,
+            gs=session.game_state,
+            history_scroll=session.history_scroll,
+            history_page_size=session.history_page_size,
+        )
+
+    def screen_text(self) -> str:
+        return "\n".join(
+            "".join(map(chr, row)).rstrip() for row in self.root.ch.tolist()
+        )
+
+
+def main(argv: list = None) -> dict:
+    parser = argparse.ArgumentParser(description="Replay a recorded game headlessly")
+    parser.add_argument("path", help="replay file")
+    parser.add_argument(
+        "--render-every",
+        type=int,
+        default=0,
+        metavar="N",
+        help="render one frame every N steps",
+    )
+    parser.add_argument(
+        "--dump", action="store_true", help="render and print the final screen"
+    )
+    args = parser.parse_args(argv)
+
+    if args.render_every or args.dump:
+        # No window is ever shown, SDL does not need a display. Set before
+        # the game modules load tcod
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    summary = replay(args.path, render_every=args.render_every, render_final=args.dump)
+    screen = summary.pop("screen", None)
+    if args.dump:
+        print(screen)
+    print(json.dumps(summary, indent=2), file=sys.stderr if args.dump else sys.stdout)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import random
+
+
+class RandomStreams:
+    """Named random number streams derived from one session seed.
+
+    Each subsystem draws from its own stream (`mapgen`, `spawning`, `ai`,
+    `combat`), so a run can be reproduced from its seed, and changing how
+    much one subsystem draws does not shift the numbers of the others.
+    Without a seed every stream is the global `random` module.
+    """
+
+    __slots__ = ("seed", "streams")
+
+    def __init__(self, seed: int = None):
+        """RandomStreams initializer
+
+        Keyword Arguments:
+            seed {int} -- session seed, None to use the global `random` module (default: {None})
+        """
+        self.seed = seed
+        self.streams = {}  # name -> random.Random
+
+    def stream(self, name: str) -> random.Random:
+        """Random number generator of a subsystem
+
+        Arguments:
+            name {str} -- name of the stream
+
+        Returns:
+            random.Random -- generator, the same object on every call
+        """
+        if self.seed is None:
+            return random
+        generator = self.streams.get(name)
+        if generator is None:
+            # String seeds are hashed with SHA-512, the same on every platform
+            generator = random.Random(f"{self.seed}:{name}")
+            self.streams[name] = generator
+        return generator
+
+    @property
+    def mapgen(self) -> random.Random:
+        return self.stream("mapgen")
+
+    @property
+    def spawning(self) -> random.Random:
+        return self.stream("spawning")
+
+    @property
+    def ai(self) -> random.Random:
+        return self.stream("ai")
+
+    @property
+    def combat(self) -> random.Random:
+        return self.stream("combat")
@@ -0,0 +1,407 @@
+"""Headless batch simulator for balance runs.
+
+Plays many seeded games with a scripted player across a process pool,
+writes one JSON line per game and prints aggregated statistics:
+
+    python simulate.py --games 10000 --output results.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from game_events import Damaged, Dead, ItemAdded, ItemConsumed
+from game_session import GameSession
+from game_states import GameStates
+from item_functions import cast_confusion, cast_fireball, cast_lighting, heal
+from turn_scheduler import ACTION_COST
+
+
+class HeuristicPlayer:
+    """Scripted player driving a GameSession through the same actions the
+    input handlers produce.
+
+    Heals when hurt, fights the closest visible monster (with scrolls when
+    they are worth it), picks up the items it has seen and otherwise
+    explores the closest unseen tile.
+    """
+
+    __slots__ = ("session", "seen", "goal", "known_items")
+
+    def __init__(self, session: GameSession):
+        """HeuristicPlayer initializer
+
+        Arguments:
+            session {GameSession} -- game to be played
+        """
+        self.session = session
+        game_map = session.game_map
+        # Tiles the player has seen, headless runs do not track `explored`
+        self.seen = np.zeros((game_map.width, game_map.height), dtype=bool, order="F")
+        self.goal = None  # unseen tile being explored, kept until it is seen
+        # Items seen on the floor. FoV is not symmetric, an item seen from
+        # one tile can be hidden from the next one. A dict used as an
+        # insertion ordered set: equal distances must be broken the same
+        # way in every process for a seed to replay the same game
+        self.known_items = {}
+
+    def next_actions(self) -> list:
+        """Choose what to do next
+
+        Returns:
+            list -- (action, mouse_action) pairs to be stepped in order, empty when there is nothing left to do
+        """
+        session = self.session
+        player = session.player
+        game_map = session.game_map
+        visible = session.fov_map.fov
+        self.seen |= visible
+
+        # Leave any menu or targeting left open by a failed action
+        if session.game_state in (GameStates.SHOW_INVENTORY, GameStates.DROP_INVENTORY):
+            return [({"exit": True}, {})]
+        if session.game_state == GameStates.TARGET_MODE:
+            return [({}, {"right_click": (0, 0)})]
+
+        fighter = player.fighter
+        if fighter.hp <= fighter.max_hp // 2:
+            potion = self.find_item(heal)
+            if potion is not None:
+                return self.use_item(potion)
+
+        monster = game_map.entity_index.nearest(
+            player.x,
+            player.y,
+            session.fov_radius,
+            predicate=lambda entity: entity.ai is not None
+            and visible[entity.x, entity.y],
+        )
+        if monster is not None:
+            return self.fight(monster)
+
+        for entity in game_map.entity_index.within_radius(
+            player.x, player.y, session.fov_radius
+        ):
+            if entity.item is not None and visible[entity.x, entity.y]:
+                self.known_items[entity] = None
+        if len(player.inventory.items) < player.inventory.capacity:
+            actions = self.collect_items()
+            if actions:
+                return actions
+
+        return self.explore()
+
+    def collect_items(self) -> list:
+        """Pick up the item underfoot, or walk to the closest known item
+
+        Returns:
+            list -- actions to be stepped, empty if there is no item to get
+        """
+        player = self.session.player
+        # Items picked up are no longer on the map
+        self.known_items = {item: None for item in self.known_items if item.game_map}
+        for item in sorted(self.known_items, key=player.distance_to):
+            if (item.x, item.y) == (player.x, player.y):
+                return [({"pickup": True}, {})]
+            actions = self.walk_to(item.x, item.y)
+            if actions:
+                return actions
+            # Unreachable for now, forget about it
+            del self.known_items[item]
+        return []
+
+    def fight(self, monster: object) -> list:
+        """Attack a monster, or get closer to it
+
+        Arguments:
+            monster {object} -- closest visible monster
+
+        Returns:
+            list -- actions to be stepped
+        """
+        player = self.session.player
+        distance = player.distance_to(monster)
+
+        # Fireballs hurt everything within 3 tiles, the player included
+        fireball = self.find_item(cast_fireball)
+        if fireball is not None and 4 <= distance:
+            return self.use_item(fireball, target=(monster.x, monster.y))
+        # Save the lightning for monsters that take more than one hit
+        lightning = self.find_item(cast_lighting)
+        if (
+            lightning is not None
+            and distance <= 5
+            and monster.fighter.hp > player.fighter.atk_power
+        ):
+            return self.use_item(lightning)
+        confusion = self.find_item(cast_confusion)
+        if (
+            confusion is not None
+            and distance < 2
+            and player.fighter.hp < player.fighter.max_hp // 2
+        ):
+            return self.use_item(confusion, target=(monster.x, monster.y))
+
+        if distance < 2:
+            dx, dy = monster.x - player.x, monster.y - player.y
+            return [({"move": (dx, dy)}, {})]
+        return self.walk_to(monster.x, monster.y)
+
+    def explore(self) -> list:
+        """Walk towards the closest tile never seen
+
+        Returns:
+            list -- actions to be stepped, empty once the map is explored
+        """
+        # Keep walking to the same tile, instead of going back and forth
+        # between tiles at about the same distance
+        if self.goal is not None and not self.seen[self.goal]:
+            actions = self.walk_to(*self.goal)
+            if actions:
+                return actions
+
+        player = self.session.player
+        game_map = self.session.game_map
+        xs, ys = np.nonzero(game_map.walkable & ~self.seen)
+        while len(xs):
+            closest = np.argmin((xs - player.x) ** 2 + (ys - player.y) ** 2)
+            x, y = int(xs[closest]), int(ys[closest])
+            actions = self.walk_to(x, y)
+            if actions:
+                self.goal = (x, y)
+                return actions
+            # Unreachable for now, forget about it
+            self.seen[x, y] = True
+            xs, ys = np.delete(xs, closest), np.delete(ys, closest)
+        return []
+
+    def walk_to(self, x: int, y: int) -> list:
+        """First step of the shortest path to a position
+
+        Arguments:
+            x {int} -- target x position
+            y {int} -- target y position
+
+        Returns:
+            list -- a move action, empty if there is no path
+        """
+        player = self.session.player
+        game_map = self.session.game_map
+        walkable = game_map.nav_map.walkable
+        # Same trick as `Entity.move_astar`: the player's and the target's
+        # own cells must be walkable for the pathfinder
+        origin, target = walkable[player.x, player.y], walkable[x, y]
+        walkable[player.x, player.y] = walkable[x, y] = True
+        path = game_map.pathfinder.get_path(player.x, player.y, x, y)
+        walkable[player.x, player.y], walkable[x, y] = origin, target
+
+        if not path:
+            return []
+        step_x, step_y = path[0]
+        return [({"move": (step_x - player.x, step_y - player.y)}, {})]
+
+    def find_item(self, use_function: object) -> object or None:
+        """First inventory item using the given function
+
+        Arguments:
+            use_function {callable} -- item function, from `item_functions`
+
+        Returns:
+            object or None -- the item, None if there is none
+        """
+        for item in self.session.player.inventory.items:
+            if item.item.use_function is use_function:
+                return item
+        return None
+
+    def use_item(self, item: object, target: tuple = None) -> list:
+        """Actions using an inventory item
+
+        Arguments:
+            item {object} -- item to be used
+
+        Keyword Arguments:
+            target {tuple} -- (x, y) position for items that need a target (default: {None})
+
+        Returns:
+            list -- actions to be stepped
+        """
+        index = self.session.player.inventory.items.index(item)
+        actions = [({"show_inventory": True}, {}), ({"inventory_index": index}, {})]
+        if target is not None:
+            actions.append(({}, {"left_click": target}))
+        return actions
+
+
+def run_game(seed: int, max_turns: int = 1000, **session_kwargs) -> dict:
+    """Play one game with the heuristic player
+
+    Arguments:
+        seed {int} -- seed of the game
+
+    Keyword Arguments:
+        max_turns {int} -- turns before the game is stopped (default: {1000})
+
+    Any other argument is passed on to `GameSession`.
+
+    Returns:
+        dict -- statistics of the game
+    """
+    start = time.perf_counter()
+    session = GameSession(seed=seed, messages_enabled=False, **session_kwargs)
+    player = session.player
+    stats = {
+        "damage_dealt": 0,
+        "damage_taken": 0,
+        "kills": 0,
+        "items_picked": 0,
+        "items_used": Counter(),
+        "last_hit_by": None,
+    }
+
+    # Collect the statistics from the game's own events
+    def on_damaged(event):
+        if event.source is player:
+            stats["damage_dealt"] += event.amount
+        if event.entity is player:
+            stats["damage_taken"] += event.amount
+            stats["last_hit_by"] = event.source.name
+
+    def on_dead(event):
+        if event.entity is not player:
+            stats["kills"] += 1
+
+    def on_item_added(event):
+        stats["items_picked"] += 1
+
+    def on_item_consumed(event):
+        stats["items_used"][event.item.name] += 1
+
+    session.events.register(Damaged, on_damaged)
+    session.events.register(Dead, on_dead)
+    session.events.register(ItemAdded, on_item_added)
+    session.events.register(ItemConsumed, on_item_consumed)
+
+    bot = HeuristicPlayer(session)
+    outcome = "timeout"
+    # Guards against a player stuck doing actions that take no time
+    steps_left = max_turns * 4
+    while steps_left > 0 and session.scheduler.time < max_turns * ACTION_COST:
+        session.update_fov()
+        actions = bot.next_actions()
+        if not actions:
+            outcome = "cleared"
+            break
+        for action, mouse_action in actions:
+            session.step(action, mouse_action)
+            steps_left -= 1
+        if session.game_state == GameStates.PLAYER_DEAD:
+            outcome = "died"
+            break
+
+    return {
+        "seed": seed,
+        "outcome": outcome,
+        "turns": (session.scheduler.time + ACTION_COST - 1) // ACTION_COST,
+        "hp": player.fighter.hp if player.fighter else 0,
+        "damage_dealt": stats["damage_dealt"],
+        "damage_taken": stats["damage_taken"],
+        "kills": stats["kills"],
+        "items_picked": stats["items_picked"],
+        "items_used": dict(stats["items_used"]),
+        "death_cause": stats["last_hit_by"] if outcome == "died" else None,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _run_game(job: tuple) -> dict:
+    # Pool workers take a single argument
+    seed, max_turns = job
+    return run_game(seed, max_turns)
+
+
+def aggregate(results: list, elapsed: float) -> dict:
+    """Summarize the statistics of many games
+
+    Arguments:
+        results {list} -- statistics of each game, as returned by `run_game`
+        elapsed {float} -- wall clock time of the whole run, in seconds
+
+    Returns:
+        dict -- aggregated statistics
+    """
+    games = len(results)
+    if not games:
+        return {"games": 0}
+
+    def mean(key):
+        return sum(result[key] for result in results) / games
+
+    items_used = Counter()
+    for result in results:
+        items_used.update(result["items_used"])
+
+    return {
+        "games": games,
+        "games_per_second": games / elapsed if elapsed else None,
+        "outcomes": dict(Counter(result["outcome"] for result in results)),
+        "death_causes": dict(
+            Counter(
+                result["death_cause"] for result in results if result["death_cause"]
+            )
+        ),
+        "mean_turns": mean("turns"),
+        "mean_damage_dealt": mean("damage_dealt"),
+        "mean_damage_taken": mean("damage_taken"),
+        "mean_kills": mean("kills"),
+        "mean_items_picked": mean("items_picked"),
+        "items_used": dict(items_used),
+    }
+
+
+def main(argv: list = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100, help="games to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument(
+        "--max-turns", type=int, default=1000, help="turns before a game is stopped"
+    )
+    parser.add_argument(
+        "--output",
+        default="simulation.jsonl",
+        help="JSON Lines file for per-game results, '-' for stdout",
+    )
+    args = parser.parse_args(argv)
+
+    jobs = [(seed, args.max_turns) for seed in range(args.seed, args.seed + args.games)]
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    results = []
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            # Results are written as soon as each game ends
+            for result in pool.imap_unordered(_run_game, jobs, chunksize=4):
+                output.write(json.dumps(result) + "\n")
+                results.append(result)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary = aggregate(results, time.perf_counter() - start)
+    print(
+        json.dumps(summary, indent=2),
+        file=sys.stderr if output is sys.stdout else sys.stdout,
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
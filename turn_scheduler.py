@@ -0,0 +1,144 @@
+import heapq
+import itertools
+
+NORMAL_SPEED = 100  # speed of an actor that acts once per player action
+ACTION_COST = 100  # time taken by one action at normal speed
+
+
+def action_time(speed: int) -> int:
+    """Time an actor with the given speed needs for one action
+
+    Arguments:
+        speed {int} -- actor speed, `NORMAL_SPEED` being one action per turn
+
+    Returns:
+        int -- time until the actor can act again
+    """
+    return max(1, ACTION_COST * NORMAL_SPEED // speed)
+
+
+class TurnScheduler:
+    """Priority queue of actors ordered by the time of their next action.
+
+    Actors with the same time act in the order they were first scheduled.
+    Removing an actor only marks its queue entry as dead, the entry is
+    dropped when it reaches the front of the queue, so both operations are
+    O(log n).
+
+    Actors can also be put to sleep: they leave the queue for the `dormant`
+    set and cost nothing until they are woken up again. A woken actor keeps
+    its place among the actors due at the same time, as if it never slept.
+    """
+
+    __slots__ = ("time", "queue", "entries", "order", "counter", "dormant")
+
+    def __init__(self):
+        """TurnScheduler initializer
+        """
+        self.time = 0  # current game time
+        # Heap of [time, order, push, actor] entries. `push` only tells apart
+        # the dead and live entries of an actor moved to the same time
+        self.queue = []
+        self.entries = {}  # actor -> its live entry in the queue
+        self.order = {}  # actor -> tie breaker, kept while the actor sleeps
+        self.counter = itertools.count()  # increasing orders and pushes
+        self.dormant = set()  # sleeping actors, out of the queue
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, actor: object) -> bool:
+        return actor in self.entries
+
+    def schedule(self, actor: object, delay: int):
+        """Queue an actor to act `delay` time units from now.
+
+        An actor already in the queue is moved to the new time.
+
+        Arguments:
+            actor {object} -- entity to be scheduled
+            delay {int} -- time until its next action
+        """
+        self._unqueue(actor)
+        self.dormant.discard(actor)
+        entry = [self.time + delay, self._order_of(actor), next(self.counter), actor]
+        self.entries[actor] = entry
+        heapq.heappush(self.queue, entry)
+
+    def remove(self, actor: object):
+        """Take an actor out of the scheduler for good, if it is in it
+
+        Arguments:
+            actor {object} -- entity to be removed
+        """
+        self._unqueue(actor)
+        self.dormant.discard(actor)
+        self.order.pop(actor, None)
+
+    def sleep(self, actor: object):
+        """Take an actor out of the queue and into the dormant set
+
+        Arguments:
+            actor {object} -- entity to be put to sleep
+        """
+        self._unqueue(actor)
+        self._order_of(actor)
+        self.dormant.add(actor)
+
+    def wake(self, actor: object, delay: int) -> bool:
+        """Queue a dormant actor again
+
+        Arguments:
+            actor {object} -- entity to be woken up
+            delay {int} -- time until its next action
+
+        Returns:
+            bool -- True if the actor was sleeping
+        """
+        if actor not in self.dormant:
+            return False
+        self.dormant.remove(actor)
+        self.schedule(actor, delay)
+        return True
+
+    def _order_of(self, actor: object) -> int:
+        """Tie breaker of an actor, given the first time it is seen
+        """
+        order = self.order.get(actor)
+        if order is None:
+            order = self.order[actor] = next(self.counter)
+        return order
+
+    def _unqueue(self, actor: object):
+        # Dead entries keep their place in the heap until they are popped
+        entry = self.entries.pop(actor, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def pop_due(self, until: int) -> object or None:
+        """Pop the next actor due to act no later than `until`.
+
+        The scheduler's time advances to the time of that actor's action.
+
+        Arguments:
+            until {int} -- latest time to consider
+
+        Returns:
+            object or None -- the actor, or None if no actor is due
+        """
+        queue = self.queue
+        while queue and queue[0][0] <= until:
+            time, _, _, actor = heapq.heappop(queue)
+            if actor is not None:
+                del self.entries[actor]
+                self.time = time
+                return actor
+        return None
+
+    def advance_to(self, time: int):
+        """Move the scheduler's clock forward
+
+        Arguments:
+            time {int} -- new current time
+        """
+        self.time = max(self.time, time)